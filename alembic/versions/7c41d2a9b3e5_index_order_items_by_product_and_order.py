@@ -0,0 +1,33 @@
+"""Index order_items by product and by order
+
+Revision ID: 7c41d2a9b3e5
+Revises: f0e2b8900e69
+Create Date: 2026-10-18 10:12:41.508311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c41d2a9b3e5'
+down_revision: Union[str, Sequence[str], None] = 'f0e2b8900e69'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_order_items_product_id', 'order_items', ['product_id', 'order_id'], unique=False)
+    op.create_index(
+        'ix_order_items_order_id', 'order_items', ['order_id'], unique=False,
+        mssql_include=['product_id', 'quantity']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_order_items_order_id', table_name='order_items')
+    op.drop_index('ix_order_items_product_id', table_name='order_items')
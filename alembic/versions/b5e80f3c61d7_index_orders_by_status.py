@@ -0,0 +1,28 @@
+"""Index orders by status
+
+Revision ID: b5e80f3c61d7
+Revises: 7c41d2a9b3e5
+Create Date: 2026-10-18 11:47:09.215634
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e80f3c61d7'
+down_revision: Union[str, Sequence[str], None] = '7c41d2a9b3e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_orders_status_id', 'orders', ['status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_status_id', table_name='orders')
@@ -1 +1 @@
-from .database import get_db
+from .database import get_db, get_async_db
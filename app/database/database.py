@@ -1,18 +1,85 @@
-from sqlalchemy import create_engine
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
-from app.settings import get_settings
+from app.database.pool import TimedAsyncAdaptedQueuePool, TimedQueuePool
+from app.settings import get_settings, Settings
+
+ASYNC_DRIVERS = {
+    "mssql": "mssql+aioodbc",
+    "mssql+pyodbc": "mssql+aioodbc",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "mysql+pymysql": "mysql+aiomysql",
+}
+
+
+def engine_options(connection_string: str, settings: Settings, is_async: bool = False) -> dict:
+    url = make_url(connection_string)
+    options = {
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle,
+    }
+    if settings.db_fast_executemany and url.drivername in ("mssql+pyodbc", "mssql+aioodbc"):
+        options["fast_executemany"] = True
+
+    # In-memory SQLite lives in a single connection and cannot use a queue pool.
+    if not (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")):
+        options.update(
+            poolclass=TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    return options
+
+
+def async_connection_string(settings: Settings) -> str:
+    """
+    DB_ASYNC_CONNECTION_STRING if set, otherwise DB_CONNECTION_STRING with its
+    driver swapped for the asyncio equivalent (aioodbc for SQL Server).
+    """
+    if settings.db_async_connection_string:
+        return settings.db_async_connection_string
+
+    url = make_url(settings.db_connection_string)
+    if url.drivername not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver known for '{url.drivername}', set DB_ASYNC_CONNECTION_STRING")
+    return url.set(drivername=ASYNC_DRIVERS[url.drivername]).render_as_string(hide_password=False)
+
 
 settings = get_settings()
-engine = create_engine(settings.db_connection_string)
+engine = create_engine(settings.db_connection_string, **engine_options(settings.db_connection_string, settings))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = None
+AsyncSessionLocal = None
+if settings.db_async:
+    async_url = async_connection_string(settings)
+    async_engine = create_async_engine(async_url, **engine_options(async_url, settings, is_async=True))
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
-def get_db():
+async def get_db():
+    """
+    Sessions only check out a connection on their first query, so requests served
+    from the in-memory store never touch the pool. Declared async so those requests
+    also skip the threadpool round trips of a sync dependency; a session that did
+    connect is closed in the threadpool because releasing the connection rolls back.
+    """
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
+        if db.in_transaction():
+            await run_in_threadpool(db.close)
+        else:
+            db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,85 @@
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.metrics import registry
+
+registry.describe("app_db_pool_acquire_seconds", "Time spent obtaining a connection from the pool.")
+_acquire_histogram = registry.histogram("app_db_pool_acquire_seconds")
+
+
+class AcquireStats:
+    __slots__ = ("acquired", "timeouts", "seconds_total", "seconds_max", "_lock")
+
+    def __init__(self):
+        self.acquired = 0
+        self.timeouts = 0
+        self.seconds_total = 0.0
+        self.seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, timed_out: bool):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.acquired += 1
+            self.seconds_total += seconds
+            self.seconds_max = max(self.seconds_max, seconds)
+        _acquire_histogram.observe(seconds)
+
+
+class _AcquireTimingMixin:
+    """
+    Times every checkout from the underlying queue, including waits for a free
+    connection and the connect of overflow connections.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.acquire_stats = AcquireStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.acquire_stats.record(time.perf_counter() - started, timed_out)
+
+
+class TimedQueuePool(_AcquireTimingMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_AcquireTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_status(pool) -> dict:
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__}
+
+    status = {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+    }
+    stats = getattr(pool, "acquire_stats", None)
+    if stats is not None:
+        status.update(
+            acquired=stats.acquired,
+            timeouts=stats.timeouts,
+            acquire_seconds_total=round(stats.seconds_total, 6),
+            acquire_seconds_max=round(stats.seconds_max, 6),
+            acquire_seconds_avg=round(stats.seconds_total / stats.acquired, 6) if stats.acquired else 0.0,
+        )
+    return status
@@ -0,0 +1,260 @@
+"""
+Process-wide request metrics exported in Prometheus text format.
+
+Series are created once and cached by their callers, so the hot path is a
+bisect plus a short per-series lock; instrumentation can stay enabled in
+production.
+Per-request phase timings (memory, sql, serialize) accumulate in a contextvar
+set by MetricsMiddleware, which also reports them in the Server-Timing header.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.total += value
+            self.count += 1
+
+
+class RequestMetrics:
+    __slots__ = ("phases", "sql_statements")
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.sql_statements = 0
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def server_timing(self, total: float) -> str:
+        entries = []
+        for phase, seconds in self.phases.items():
+            entry = f"{phase};dur={seconds * 1000:.3f}"
+            if phase == "sql":
+                entry += f';desc="{self.sql_statements} statements"'
+            entries.append(entry)
+        entries.append(f"total;dur={total * 1000:.3f}")
+        return ", ".join(entries)
+
+
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, Counter]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._help: Dict[str, str] = {}
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def counter(self, name: str, **labels: str) -> Counter:
+        key = tuple(sorted(labels.items()))
+        series = self._counters.get(name)
+        if series is None or key not in series:
+            with self._lock:
+                series = self._counters.setdefault(name, {})
+                if key not in series:
+                    series[key] = Counter()
+        return series[key]
+
+    def histogram(self, name: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels: str) -> Histogram:
+        key = tuple(sorted(labels.items()))
+        series = self._histograms.get(name)
+        if series is None or key not in series:
+            with self._lock:
+                series = self._histograms.setdefault(name, {})
+                if key not in series:
+                    series[key] = Histogram(buckets)
+        return series[key]
+
+    def clear(self):
+        """Zeroes every series in place; handles cached by callers stay valid."""
+        with self._lock:
+            for series in self._counters.values():
+                for counter in series.values():
+                    counter.value = 0
+            for series in self._histograms.values():
+                for histogram in series.values():
+                    histogram.counts = [0] * len(histogram.counts)
+                    histogram.total = 0.0
+                    histogram.count = 0
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name, series in self._counters.items():
+                lines.extend(self._header(name, "counter"))
+                for labels, counter in series.items():
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(counter.value)}")
+
+            for name, series in self._histograms.items():
+                lines.extend(self._header(name, "histogram"))
+                for labels, histogram in series.items():
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', _format_value(bound)),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total!r}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, name: str, kind: str) -> list:
+        header = [f"# TYPE {name} {kind}"]
+        if name in self._help:
+            header.insert(0, f"# HELP {name} {self._help[name]}")
+        return header
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+registry = Registry()
+registry.describe("app_requests_total", "HTTP requests by method, route template and status code.")
+registry.describe("app_request_duration_seconds", "HTTP request latency by method and route template.")
+registry.describe("app_operation_duration_seconds", "Time spent per phase: memory lookups, SQL, serialization.")
+registry.describe("app_sql_statements_total", "SQL statements executed.")
+registry.describe("app_sql_statements_per_request", "SQL statements executed per HTTP request.")
+
+_sql_statements = registry.counter("app_sql_statements_total")
+_phase_histograms: Dict[str, Histogram] = {}
+
+
+def _phase_histogram(phase: str) -> Histogram:
+    histogram = _phase_histograms.get(phase)
+    if histogram is None:
+        histogram = _phase_histograms[phase] = registry.histogram("app_operation_duration_seconds", operation=phase)
+    return histogram
+
+
+class timed:
+    """
+    Records the wrapped block in the operation histogram and, inside a request,
+    in that request's Server-Timing entry for the phase.
+    """
+    __slots__ = ("phase", "started")
+
+    def __init__(self, phase: str):
+        self.phase = phase
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.started
+        _phase_histogram(self.phase).observe(elapsed)
+        current = _current.get()
+        if current is not None:
+            current.add(self.phase, elapsed)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context rather than the pooled connection: a failed
+    # statement never fires after_cursor_execute, and its context is discarded.
+    if context is not None:
+        context.metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "metrics_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    _sql_statements.inc()
+    _phase_histogram("sql").observe(elapsed)
+    current = _current.get()
+    if current is not None:
+        current.sql_statements += 1
+        current.add("sql", elapsed)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware: counts requests, observes their latency under the
+    matched route template and appends a Server-Timing header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_metrics = RequestMetrics()
+        token = _current.set(request_metrics)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                timing = request_metrics.server_timing(time.perf_counter() - started)
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            template = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            registry.counter("app_requests_total", method=method, route=template, status=str(status_code)).inc()
+            registry.histogram("app_request_duration_seconds", method=method, route=template).observe(
+                time.perf_counter() - started
+            )
+            registry.histogram("app_sql_statements_per_request", COUNT_BUCKETS, method=method, route=template).observe(
+                request_metrics.sql_statements
+            )
@@ -1,3 +1,5 @@
+from app.models.analytics import ProductSales, StatusSummary
+from app.models.bulk import BulkResult, BulkRowError
 from app.models.orders import OrderCreate, OrderItemCreate, OrderItemResponse, OrderResponse
 from app.models.products import ProductBase, ProductCreate, ProductResponse
 
@@ -9,4 +11,8 @@ __all__ = [
     "OrderItemCreate",
     "OrderItemResponse",
     "OrderResponse",
+    "BulkResult",
+    "BulkRowError",
+    "ProductSales",
+    "StatusSummary",
 ]
@@ -0,0 +1,16 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class ProductSales(BaseModel):
+    product_id: int
+    name: Optional[str] = Field(None, description="Product name, when the product still exists")
+    units: int = Field(..., description="Units ordered across all orders")
+
+
+class StatusSummary(BaseModel):
+    status: str
+    orders: int
+    units: int = Field(..., description="Units ordered across the orders in this status")
+    revenue: float = Field(..., description="Units times the current price of each product")
@@ -0,0 +1,19 @@
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+class BulkRowError(BaseModel):
+    index: int = Field(..., description="Zero-based position of the row in the array or NDJSON stream")
+    message: str
+
+
+class BulkResult(BaseModel):
+    created: int = 0
+    ids: List[int] = Field(default_factory=list, description="Ids of the created rows, in input order")
+    errors: List[BulkRowError] = Field(default_factory=list)
+
+    def merge(self, other: "BulkResult"):
+        self.created += other.created
+        self.ids.extend(other.ids)
+        self.errors.extend(other.errors)
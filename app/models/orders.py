@@ -2,6 +2,8 @@ from typing import List, Optional
 
 from pydantic import BaseModel, Field, field_validator, ConfigDict
 
+ORDER_STATUS_PATTERN = "^(Pending|Shipped|Delivered|Cancelled)$"
+
 
 class OrderItemCreate(BaseModel):
     product_id: int = Field(..., gt=0, description="Valid Product ID")
@@ -29,7 +31,7 @@ class OrderCreate(BaseModel):
 
 
 class OrderUpdate(BaseModel):
-    status: Optional[str] = Field(None, pattern="^(Pending|Shipped|Delivered|Cancelled)$")
+    status: Optional[str] = Field(None, pattern=ORDER_STATUS_PATTERN)
     items: Optional[List[OrderItemCreate]] = Field(None, min_length=1)
 
     @field_validator('items')
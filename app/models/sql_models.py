@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.database.database import Base
@@ -14,6 +14,10 @@ class ProductSQL(Base):
 
 class OrderSQL(Base):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Keyset pages of one status: equality on status, then the id cursor.
+        Index("ix_orders_status_id", "status", "id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     status = Column(String(50), default="Pending")
     items = relationship("OrderItemSQL", back_populates="order", cascade="all, delete")
@@ -21,6 +25,12 @@ class OrderSQL(Base):
 
 class OrderItemSQL(Base):
     __tablename__ = "order_items"
+    __table_args__ = (
+        # (product_id, order_id) answers "orders containing a product" from the index alone.
+        Index("ix_order_items_product_id", "product_id", "order_id"),
+        # Loading or cascading an order's items; SQL Server also carries the item columns.
+        Index("ix_order_items_order_id", "order_id", mssql_include=["product_id", "quantity"]),
+    )
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(Integer, ForeignKey("orders.id"))
     product_id = Column(Integer, ForeignKey("products.id"))
@@ -1,17 +1,91 @@
+import sys
+from array import array
 from typing import Optional
 
-from app.models.orders import OrderResponse
+from app.models.orders import OrderResponse, OrderItemResponse
 from app.models.products import ProductResponse
+from app.serialization import dumps
 
 
 class BSTNode:
+    """
+    AVL node holding a product's fields directly (no Pydantic model, no __dict__).
+    `size` and `expires_at` carry the cache bookkeeping of the entry; `json`
+    optionally keeps the encoded response so cache hits skip serialization, and
+    `etag` the hash of that encoding.
+    """
+    __slots__ = (
+        "id", "name", "price", "description", "json", "etag", "left", "right", "height", "size", "expires_at"
+    )
+
     def __init__(self, product: ProductResponse):
-        self.product = product
+        self.set_product(product)
         self.left: Optional['BSTNode'] = None
         self.right: Optional['BSTNode'] = None
+        self.height: int = 1
+        self.size: int = 0
+        self.expires_at: Optional[float] = None
+
+    def set_product(self, product: ProductResponse):
+        self.id = product.id
+        self.name = product.name
+        self.price = product.price
+        self.description = product.description
+        self.json: Optional[bytes] = None
+        self.etag: Optional[str] = None
+
+    def to_json(self) -> bytes:
+        # Same key order as ProductResponse.model_dump_json().
+        return dumps({"name": self.name, "price": self.price, "description": self.description, "id": self.id})
+
+    @property
+    def product(self) -> ProductResponse:
+        return ProductResponse.model_construct(
+            id=self.id, name=self.name, price=self.price, description=self.description
+        )
 
 
 class ListNode:
+    """
+    Doubly linked order node. Line items are packed into a single int array of
+    (product_id, quantity) pairs instead of a list of OrderItemResponse models.
+    """
+    __slots__ = ("id", "status", "items", "json", "etag", "prev", "next", "size", "expires_at")
+
     def __init__(self, order: OrderResponse):
-        self.order = order
+        self.set_order(order)
+        self.prev: Optional['ListNode'] = None
         self.next: Optional['ListNode'] = None
+        self.size: int = 0
+        self.expires_at: Optional[float] = None
+
+    def set_order(self, order: OrderResponse):
+        self.id = order.id
+        self.status = sys.intern(order.status)
+        items = array("i")
+        for item in order.items:
+            items.append(item.product_id)
+            items.append(item.quantity)
+        self.items = items
+        self.json: Optional[bytes] = None
+        self.etag: Optional[str] = None
+
+    def to_json(self) -> bytes:
+        items = self.items
+        return dumps({
+            "id": self.id,
+            "status": self.status,
+            "items": [{"product_id": items[i], "quantity": items[i + 1]} for i in range(0, len(items), 2)]
+        })
+
+    @property
+    def order(self) -> OrderResponse:
+        items = self.items
+        return OrderResponse.model_construct(
+            id=self.id,
+            status=self.status,
+            items=[
+                OrderItemResponse.model_construct(product_id=items[i], quantity=items[i + 1])
+                for i in range(0, len(items), 2)
+            ]
+        )
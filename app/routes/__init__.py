@@ -1,2 +1,7 @@
 from .orders import router as orders_router
 from .products import router as products_router
+from .diagnostics import router as diagnostics_router
+from .metrics import router as metrics_router
+from .analytics import router as analytics_router
+from .async_orders import router as async_orders_router
+from .async_products import router as async_products_router
@@ -0,0 +1,37 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models import ProductSales, StatusSummary
+from app.services import AnalyticsService
+from app.services import get_api_key
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["Analytics"],
+    dependencies=[Depends(get_api_key)]
+)
+
+
+@router.get("/top-products", response_model=List[ProductSales])
+def top_products(
+        limit: int = Query(10, ge=1, le=100, description="Number of products to return"),
+        db: Session = Depends(get_db)
+):
+    """
+    Best-selling products by units ordered. Read from totals maintained on every
+    order change when the Linked List holds every order (O(n log limit) with a
+    heap), otherwise aggregated by SQL Server.
+    """
+    return AnalyticsService.top_products(db, limit)
+
+
+@router.get("/statuses", response_model=List[StatusSummary])
+def status_summary(db: Session = Depends(get_db)):
+    """
+    Order count, units and revenue per order status. Revenue uses the current
+    price of each product.
+    """
+    return AnalyticsService.status_summary(db)
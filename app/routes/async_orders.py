@@ -0,0 +1,6 @@
+from app.database import get_async_db
+from app.routes.orders import build_router
+from app.routes.service_calls import awaited
+from app.services import AsyncOrderService
+
+router = build_router(AsyncOrderService, get_async_db, awaited)
@@ -0,0 +1,6 @@
+from app.database import get_async_db
+from app.routes.products import build_router
+from app.routes.service_calls import awaited
+from app.services import AsyncOrderService, AsyncProductService
+
+router = build_router(AsyncProductService, AsyncOrderService, get_async_db, awaited)
@@ -0,0 +1,91 @@
+import json
+from typing import AsyncIterator, List, Tuple, Type, TypeVar
+
+from fastapi import Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+from app.models import BulkRowError
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+Model = TypeVar("Model", bound=BaseModel)
+Chunk = Tuple[List[Tuple[int, Model]], List[BulkRowError]]
+
+
+def bulk_openapi(model: Type[BaseModel]) -> dict:
+    """Documents the manually parsed body of a bulk endpoint."""
+    array = {"type": "array", "items": {"$ref": f"#/components/schemas/{model.__name__}"}}
+    row = {"$ref": f"#/components/schemas/{model.__name__}"}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": array},
+                "application/x-ndjson": {"schema": row},
+            },
+        }
+    }
+
+
+async def read_bulk_rows(request: Request, model: Type[Model], chunk_size: int) -> AsyncIterator[Chunk]:
+    """
+    Yields the body of a bulk request in chunks of (index, model) pairs plus the
+    rows that failed validation. NDJSON bodies are parsed while they stream in,
+    so memory stays bounded by the chunk size instead of the upload size.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in NDJSON_TYPES:
+        rows = _ndjson_rows(request)
+        validate = model.model_validate_json
+    else:
+        rows = _array_rows(await request.body())
+        validate = model.model_validate
+
+    valid: List[Tuple[int, Model]] = []
+    errors: List[BulkRowError] = []
+    async for index, raw in rows:
+        try:
+            valid.append((index, validate(raw)))
+        except ValidationError as exc:
+            errors.append(BulkRowError(index=index, message=_format_errors(exc)))
+
+        if len(valid) + len(errors) >= chunk_size:
+            yield valid, errors
+            valid, errors = [], []
+
+    if valid or errors:
+        yield valid, errors
+
+
+async def _array_rows(body: bytes):
+    try:
+        data = json.loads(body)
+    except ValueError:
+        data = None
+    if not isinstance(data, list):
+        raise RequestValidationError([{"loc": ("body",), "msg": "Body must be a JSON array", "type": "list_type"}])
+
+    for index, raw in enumerate(data):
+        yield index, raw
+
+
+async def _ndjson_rows(request: Request):
+    index = 0
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield index, line
+                index += 1
+    if pending.strip():
+        yield index, pending
+
+
+def _format_errors(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(x) for x in error['loc']) or 'row'}: {error['msg']}"
+        for error in exc.errors()
+    )
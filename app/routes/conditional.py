@@ -0,0 +1,39 @@
+from typing import Callable, FrozenSet, Optional
+
+from fastapi import Request, Response, status
+
+from app.serialization import JSONBytesResponse
+from app.settings import get_settings
+
+settings = get_settings()
+
+
+def if_none_match(request: Request) -> FrozenSet[str]:
+    """ETags listed in If-None-Match. GET compares them weakly, so W/ prefixes are dropped."""
+    header = request.headers.get("if-none-match", "")
+    return frozenset(tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip())
+
+
+def not_modified(request: Request, get_etag: Callable[[int], Optional[str]], entity_id: int) -> Optional[Response]:
+    """
+    A 304 response when the client already holds the current representation of
+    the entity, else None. The cache is only consulted if the request is conditional.
+    """
+    known = if_none_match(request)
+    if not known:
+        return None
+    etag = get_etag(entity_id)
+    if etag is None or not (etag in known or "*" in known):
+        return None
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=_cache_headers(etag))
+
+
+def tagged_response(etag: Optional[str], body: bytes) -> JSONBytesResponse:
+    return JSONBytesResponse(body, headers=_cache_headers(etag))
+
+
+def _cache_headers(etag: Optional[str]) -> dict:
+    headers = {"ETag": etag} if etag else {}
+    if settings.http_cache_control:
+        headers["Cache-Control"] = settings.http_cache_control
+    return headers
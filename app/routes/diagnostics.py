@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends
+
+from app.database.database import engine, async_engine
+from app.database.pool import pool_status
+from app.services import get_api_key
+from app.services import status_writer, store
+
+router = APIRouter(
+    prefix="/diagnostics",
+    tags=["Diagnostics"],
+    dependencies=[Depends(get_api_key)]
+)
+
+
+@router.get("/cache")
+def cache_stats():
+    """
+    Returns hit/miss/eviction counters and current size of the in-memory store.
+    Useful to size the cache limits configured in Settings.
+    """
+    return store.stats()
+
+
+@router.get("/pool")
+def pool_stats():
+    """
+    Returns connection pool usage: checked-out and overflow connections plus the
+    time spent acquiring them. Sustained non-zero waits mean DB_POOL_SIZE is too small.
+    """
+    stats = {"sync": pool_status(engine.pool)}
+    if async_engine is not None:
+        stats["async"] = pool_status(async_engine.pool)
+    return stats
+
+
+@router.get("/write-behind")
+def write_behind_stats():
+    """
+    Returns the state of the order status write-behind: order changes waiting
+    for the next flush and flush counters. A growing backlog means SQL writes
+    are failing or falling behind.
+    """
+    return status_writer.stats()
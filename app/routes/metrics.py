@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.metrics import registry
+from app.services import get_api_key
+from app.services import store
+
+router = APIRouter(
+    tags=["Diagnostics"],
+    dependencies=[Depends(get_api_key)]
+)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Prometheus text exposition of request, SQL and cache metrics.
+    """
+    lines = []
+    stats = store.stats()
+    for counter in ("hits", "misses", "negative_hits", "evictions", "expirations"):
+        name = f"app_cache_{counter}_total"
+        lines.append(f"# TYPE {name} counter")
+        for entity in ("products", "orders"):
+            lines.append(f'{name}{{entity="{entity}"}} {stats[entity][counter]}')
+    for gauge in ("entries", "bytes"):
+        name = f"app_cache_{gauge}"
+        lines.append(f"# TYPE {name} gauge")
+        for entity in ("products", "orders"):
+            lines.append(f'{name}{{entity="{entity}"}} {stats[entity][gauge]}')
+
+    return PlainTextResponse(registry.render() + "\n".join(lines) + "\n", media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,72 +1,127 @@
-from typing import List
+from typing import Callable, List, Optional
 
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request, status
 
 from app.database import get_db
-from app.models import OrderResponse, OrderCreate
-from app.models.orders import OrderUpdate
+from app.models import BulkResult, OrderResponse, OrderCreate
+from app.models.orders import ORDER_STATUS_PATTERN, OrderUpdate
+from app.routes.bulk_input import bulk_openapi, read_bulk_rows
+from app.routes.conditional import not_modified, tagged_response
+from app.routes.service_calls import ServiceCall, in_threadpool
+from app.routes.streaming import NDJSON_MEDIA_TYPE, ndjson_response, wants_stream
+from app.serialization import JSONBytesResponse
 from app.services import OrderService
 from app.services import get_api_key
+from app.settings import get_settings
 
-router = APIRouter(
-    prefix="/orders",
-    tags=["Orders"],
-    dependencies=[Depends(get_api_key)]
-)
+settings = get_settings()
 
 
-@router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
-def create_order(
-        order: OrderCreate,
-        db: Session = Depends(get_db)
-):
+def build_router(orders: type, get_session: Callable, call: ServiceCall) -> APIRouter:
     """
-    Creates a new order.
-    Validates business rules (e.g., product existence) before creation.
+    The order endpoints for one database stack, built like the product ones
+    (see app.routes.products.build_router).
     """
-    return OrderService.create(db, order)
+    router = APIRouter(
+        prefix="/orders",
+        tags=["Orders"],
+        dependencies=[Depends(get_api_key)]
+    )
 
+    @router.post("/", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+    async def create_order(
+            order: OrderCreate,
+            db=Depends(get_session)
+    ):
+        """
+        Creates a new order.
+        Validates business rules (e.g., product existence) before creation.
+        """
+        return await call(orders.create, db, order)
 
-@router.get("/", response_model=List[OrderResponse])
-def list_orders(db: Session = Depends(get_db)):
-    """
-    Lists all active orders. Loads from SQL if memory is empty (Cold Start).
-    """
-    return OrderService.get_all(db)
+    @router.post("/bulk", response_model=BulkResult, openapi_extra=bulk_openapi(OrderCreate))
+    async def bulk_create_orders(
+            request: Request,
+            db=Depends(get_session)
+    ):
+        """
+        Creates many orders from a JSON array or an NDJSON stream (Content-Type:
+        application/x-ndjson). Rows are validated one by one and inserted in chunks
+        of BULK_CHUNK_SIZE with a single commit each; invalid rows are listed in
+        `errors` without aborting the rest of the batch. Orders referencing unknown
+        products are rejected individually.
+        """
+        result = BulkResult()
+        async for rows, errors in read_bulk_rows(request, OrderCreate, settings.bulk_chunk_size):
+            result.errors.extend(errors)
+            if rows:
+                result.merge(await call(orders.create_many, db, rows))
+        result.errors.sort(key=lambda error: error.index)
+        return result
 
+    @router.get("/", response_model=List[OrderResponse], responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}})
+    async def list_orders(
+            request: Request,
+            limit: Optional[int] = Query(None, ge=1, le=1000, description="Maximum number of orders to return"),
+            after: Optional[int] = Query(None, ge=0, description="Return orders with an id greater than this cursor"),
+            status: Optional[str] = Query(None, pattern=ORDER_STATUS_PATTERN, description="Only orders in this status"),
+            stream: bool = Query(False, description="Return NDJSON instead of a JSON array"),
+            db=Depends(get_session)
+    ):
+        """
+        Lists active orders sorted by id, optionally paginated with a keyset cursor
+        (pass the last id received as `after`). Served from the Linked List once it
+        holds every order, otherwise from SQL with items loaded in a single extra query.
+        Filtering by `status` reads that status' id list in memory, or the
+        orders(status, id) index in SQL, instead of scanning every order.
+        Add `stream=true` or send `Accept: application/x-ndjson` to receive the orders as
+        NDJSON, one per line, without a size cap.
+        """
+        if wants_stream(request, stream):
+            listing = orders.stream(db, limit, after, settings.stream_chunk_size, status)
+            return ndjson_response(listing, settings.stream_chunk_size)
+        return JSONBytesResponse(await call(orders.get_all, db, limit=limit, after=after, as_json=True, status=status))
 
-@router.get("/{order_id}", response_model=OrderResponse)
-def get_order(
-        order_id: int,
-        db: Session = Depends(get_db)
-):
-    """
-    Retrieves a specific order by ID checking Memory then SQL.
-    """
-    return OrderService.get_by_id(db, order_id)
+    @router.get("/{order_id}", response_model=OrderResponse, responses={304: {"description": "Not Modified"}})
+    async def get_order(
+            order_id: int,
+            request: Request,
+            db=Depends(get_session)
+    ):
+        """
+        Retrieves a specific order by ID checking Memory then SQL.
+        Sends an ETag; a request whose If-None-Match still matches the cached entry
+        gets 304 Not Modified without touching SQL Server or encoding the body.
+        """
+        cached = not_modified(request, OrderService.get_etag, order_id)
+        if cached:
+            return cached
+        return tagged_response(*await call(orders.get_tagged, db, order_id))
 
+    @router.put("/{order_id}", response_model=OrderResponse)
+    async def update_order(
+            order_id: int,
+            order_update: OrderUpdate,
+            db=Depends(get_session)
+    ):
+        """
+        Updates an existing order (Status or Items).
+        Updates SQL Server and syncs the changes to the Linked List in memory.
+        """
+        return await call(orders.update, db, order_id, order_update)
 
-@router.put("/{order_id}", response_model=OrderResponse)
-def update_order(
-        order_id: int,
-        order_update: OrderUpdate,
-        db: Session = Depends(get_db)
-):
-    """
-    Updates an existing order (Status or Items).
-    Updates SQL Server and syncs the changes to the Linked List in memory.
-    """
-    return OrderService.update(db, order_id, order_update)
+    @router.delete("/{order_id}", status_code=status.HTTP_200_OK)
+    async def delete_order(
+            order_id: int,
+            db=Depends(get_session)
+    ):
+        """
+        Deletes an order from both memory (Linked List) and SQL Server.
+        """
+        await call(orders.delete, db, order_id)
+        return {"detail": "Order deleted successfully"}
 
+    return router
 
-@router.delete("/{order_id}", status_code=status.HTTP_200_OK)
-def delete_order(
-        order_id: int,
-        db: Session = Depends(get_db)
-):
-    """
-    Deletes an order from both memory (Linked List) and SQL Server.
-    """
-    OrderService.delete(db, order_id)
-    return {"detail": "Order deleted successfully"}
+
+router = build_router(OrderService, get_db, in_threadpool)
@@ -1,36 +1,129 @@
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from typing import Callable, List, Optional
+
+from fastapi import APIRouter, Depends, Query, Request, status
 
 from app.database import get_db
-from app.models import ProductResponse, ProductCreate
-from app.services import ProductService
+from app.models import BulkResult, OrderResponse, ProductResponse, ProductCreate
+from app.routes.bulk_input import bulk_openapi, read_bulk_rows
+from app.routes.conditional import not_modified, tagged_response
+from app.routes.service_calls import ServiceCall, in_threadpool
+from app.routes.streaming import NDJSON_MEDIA_TYPE, ndjson_response, wants_stream
+from app.serialization import JSONBytesResponse
+from app.services import OrderService, ProductService
 from app.services import get_api_key
+from app.settings import get_settings
 
-router = APIRouter(
-    prefix="/products",
-    tags=["Products"],
-    dependencies=[Depends(get_api_key)]
-)
+settings = get_settings()
 
 
-@router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
-def create_product(
-        product: ProductCreate,
-        db: Session = Depends(get_db)
-):
+def build_router(products: type, orders: type, get_session: Callable, call: ServiceCall) -> APIRouter:
     """
-    Creates a new product in SQL Server and adds it to the BST in memory.
+    The product endpoints for one database stack. Validation, ETags, streaming
+    and the response format are shared; the stack supplies the service classes,
+    the session dependency and how their methods are called. ETags are peeked
+    from memory, so both stacks use ProductService.get_etag.
     """
-    return ProductService.create(db, product)
+    router = APIRouter(
+        prefix="/products",
+        tags=["Products"],
+        dependencies=[Depends(get_api_key)]
+    )
 
+    @router.post("/", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
+    async def create_product(
+            product: ProductCreate,
+            db=Depends(get_session)
+    ):
+        """
+        Creates a new product in SQL Server and adds it to the BST in memory.
+        """
+        return await call(products.create, db, product)
 
-@router.get("/{product_id}", response_model=ProductResponse)
-def get_product(
-        product_id: int,
-        db: Session = Depends(get_db)
-):
-    """
-    Retrieves a product. Checks memory (BST) first, then SQL Server.
-    Time Complexity: O(log n) if cached, else SQL Query time.
-    """
-    return ProductService.get_by_id(db, product_id)
+    @router.post("/bulk", response_model=BulkResult, openapi_extra=bulk_openapi(ProductCreate))
+    async def bulk_create_products(
+            request: Request,
+            db=Depends(get_session)
+    ):
+        """
+        Creates many products from a JSON array or an NDJSON stream (Content-Type:
+        application/x-ndjson). Rows are validated one by one and inserted in chunks
+        of BULK_CHUNK_SIZE with a single commit each; invalid rows are listed in
+        `errors` without aborting the rest of the batch.
+        """
+        result = BulkResult()
+        async for rows, errors in read_bulk_rows(request, ProductCreate, settings.bulk_chunk_size):
+            result.errors.extend(errors)
+            if rows:
+                result.merge(await call(products.create_many, db, rows))
+        result.errors.sort(key=lambda error: error.index)
+        return result
+
+    @router.get("/", response_model=List[ProductResponse], responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}})
+    async def search_products(
+            request: Request,
+            name: Optional[str] = Query(
+                None, min_length=1, max_length=100, description="Name prefix (case-insensitive)"
+            ),
+            min_price: Optional[float] = Query(None, ge=0),
+            max_price: Optional[float] = Query(None, ge=0),
+            sort: str = Query(
+                "id", pattern="^-?(id|name|price)$", description="Sort field, prefix with '-' for descending"
+            ),
+            limit: Optional[int] = Query(
+                None, ge=1, le=1000, description="Page size, 50 by default; streams are unbounded"
+            ),
+            offset: int = Query(0, ge=0),
+            stream: bool = Query(False, description="Return NDJSON instead of a JSON array"),
+            db=Depends(get_session)
+    ):
+        """
+        Browses the catalog by name prefix and price range.
+        Served from the in-memory name/price indexes when the whole catalog is cached,
+        otherwise from SQL Server using the name index.
+        Add `stream=true` or send `Accept: application/x-ndjson` to receive every match as
+        NDJSON, one per line, without a size cap.
+        """
+        if wants_stream(request, stream):
+            chunk_size = settings.stream_chunk_size
+            matches = products.stream(db, name, min_price, max_price, sort, limit, offset, chunk_size)
+            return ndjson_response(matches, chunk_size)
+
+        found = await call(products.search, db, name, min_price, max_price, sort, limit or 50, offset, as_json=True)
+        return JSONBytesResponse(found)
+
+    @router.get("/{product_id}", response_model=ProductResponse, responses={304: {"description": "Not Modified"}})
+    async def get_product(
+            product_id: int,
+            request: Request,
+            db=Depends(get_session)
+    ):
+        """
+        Retrieves a product. Checks memory (BST) first, then SQL Server.
+        Time Complexity: O(log n) if cached, else SQL Query time.
+        Sends an ETag; a request whose If-None-Match still matches the cached entry
+        gets 304 Not Modified without touching SQL Server or encoding the body.
+        """
+        cached = not_modified(request, ProductService.get_etag, product_id)
+        if cached:
+            return cached
+        return tagged_response(*await call(products.get_tagged, db, product_id))
+
+    @router.get("/{product_id}/orders", response_model=List[OrderResponse])
+    async def get_product_orders(
+            product_id: int,
+            limit: Optional[int] = Query(None, ge=1, le=1000, description="Maximum number of orders to return"),
+            after: Optional[int] = Query(None, ge=0, description="Return orders with an id greater than this cursor"),
+            db=Depends(get_session)
+    ):
+        """
+        Lists the orders that contain a product, sorted by id and paginated like
+        GET /orders/. Served from the product -> orders index kept in memory when
+        every order is cached, otherwise from SQL Server through the
+        order_items(product_id) index.
+        """
+        return JSONBytesResponse(await call(orders.get_by_product, db, product_id, limit, after, as_json=True))
+
+    return router
+
+
+router = build_router(ProductService, OrderService, get_db, in_threadpool)
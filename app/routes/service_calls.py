@@ -0,0 +1,13 @@
+from typing import Any, Awaitable, Callable
+
+from fastapi.concurrency import run_in_threadpool
+
+# How a router runs a service method: the sync stack sends its blocking calls to
+# the threadpool, the async stack awaits its coroutines on the event loop.
+ServiceCall = Callable[..., Awaitable[Any]]
+
+in_threadpool: ServiceCall = run_in_threadpool
+
+
+async def awaited(method: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+    return await method(*args, **kwargs)
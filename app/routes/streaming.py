@@ -0,0 +1,57 @@
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, List, Union
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.routes.bulk_input import NDJSON_TYPES
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+Items = Union[Iterable[BaseModel], AsyncIterable[BaseModel]]
+
+
+def wants_stream(request: Request, stream: bool) -> bool:
+    """True when the client asked for NDJSON with ?stream=true or the Accept header."""
+    if stream:
+        return True
+    accepted = (media.split(";")[0].strip() for media in request.headers.get("accept", "").split(","))
+    return any(media in NDJSON_TYPES for media in accepted)
+
+
+def ndjson_response(items: Items, batch_size: int) -> StreamingResponse:
+    """
+    Streams one JSON document per line. Lines are sent in batches of batch_size
+    so a sync source costs one threadpool hop per batch instead of per item.
+    """
+    if hasattr(items, "__aiter__"):
+        body = _async_batches(items, batch_size)
+    else:
+        body = _batches(items, batch_size)
+    return StreamingResponse(body, media_type=NDJSON_MEDIA_TYPE)
+
+
+def _batches(items: Iterable[BaseModel], batch_size: int) -> Iterator[bytes]:
+    lines: List[str] = []
+    for item in items:
+        lines.append(item.model_dump_json())
+        if len(lines) >= batch_size:
+            yield _encode(lines)
+            lines = []
+    if lines:
+        yield _encode(lines)
+
+
+async def _async_batches(items: AsyncIterable[BaseModel], batch_size: int) -> AsyncIterator[bytes]:
+    lines: List[str] = []
+    async for item in items:
+        lines.append(item.model_dump_json())
+        if len(lines) >= batch_size:
+            yield _encode(lines)
+            lines = []
+    if lines:
+        yield _encode(lines)
+
+
+def _encode(lines: List[str]) -> bytes:
+    return ("\n".join(lines) + "\n").encode()
@@ -0,0 +1,46 @@
+"""
+JSON encoding for responses built from trusted data: cache nodes and SQL rows
+written through the API, which already satisfy the response schemas.
+
+Routes return these bytes in a JSONBytesResponse, which FastAPI sends as is
+instead of validating and serializing the result again against response_model.
+orjson encodes plain dicts when it is installed; Pydantic models always go
+through their compiled serializer, which beats model_dump followed by orjson.
+"""
+import hashlib
+from typing import Any, Iterable
+
+from pydantic import BaseModel
+from pydantic_core import to_json
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(value: Any) -> bytes:
+    models = isinstance(value, BaseModel) or (isinstance(value, list) and value and isinstance(value[0], BaseModel))
+    if orjson is None or models:
+        return to_json(value)
+    return orjson.dumps(value)
+
+
+def etag(document: bytes) -> str:
+    """Strong ETag of an encoded document: equal bytes give the same tag in every process."""
+    return f'"{hashlib.blake2b(document, digest_size=8).hexdigest()}"'
+
+
+def json_array(documents: Iterable[bytes]) -> bytes:
+    """Joins already encoded documents into a JSON array without decoding them."""
+    return b"[" + b",".join(documents) + b"]"
+
+
+class JSONBytesResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
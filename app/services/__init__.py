@@ -1,4 +1,9 @@
+from .analytics_service import AnalyticsService
+from .async_order_service import AsyncOrderService
+from .async_product_service import AsyncProductService
 from .auth_service import get_api_key
 from .order_service import OrderService
 from .product_service import ProductService
 from .store_manager import DataStore, store
+from .warmup import CacheWarmup
+from .write_behind import OrderStatusWriteBehind, status_writer
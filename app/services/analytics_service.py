@@ -0,0 +1,89 @@
+from typing import List
+
+from sqlalchemy import Select, distinct, func, select
+from sqlalchemy.orm import Session
+
+from app.metrics import timed
+from app.models import ProductSales, StatusSummary
+from app.models.sql_models import OrderItemSQL, OrderSQL, ProductSQL
+from app.services.order_service import OrderService
+from app.services.product_service import ProductService
+from app.services.store_manager import store
+
+
+class AnalyticsService:
+    """
+    Order analytics served from the aggregates the DataStore keeps up to date
+    while it holds every order, otherwise computed by SQL with GROUP BY.
+    """
+
+    @staticmethod
+    def top_products(db: Session, limit: int = 10) -> List[ProductSales]:
+        store.sync()
+        if store.orders_complete:
+            with timed("memory"):
+                ranked = store.top_products_by_units(limit)
+        else:
+            ranked = [tuple(row) for row in db.execute(AnalyticsService._top_products_statement(limit))]
+
+        products = ProductService.get_many(db, [product_id for product_id, _ in ranked])
+        return [
+            ProductSales(
+                product_id=product_id,
+                name=products[product_id].name if product_id in products else None,
+                units=units
+            )
+            for product_id, units in ranked
+        ]
+
+    @staticmethod
+    def status_summary(db: Session) -> List[StatusSummary]:
+        store.sync()
+        if not store.orders_complete:
+            OrderService._flush_deferred_statuses()
+            rows = db.execute(AnalyticsService._status_statement())
+            return [
+                StatusSummary(status=status, orders=orders, units=units, revenue=round(revenue, 2))
+                for status, orders, units, revenue in rows
+            ]
+
+        with timed("memory"):
+            totals = store.order_status_totals()
+        product_ids = {product_id for _, units in totals.values() for product_id in units}
+        prices = {product_id: p.price for product_id, p in ProductService.get_many(db, product_ids).items()}
+
+        return [
+            StatusSummary(
+                status=status,
+                orders=orders,
+                units=sum(units.values()),
+                revenue=round(sum(quantity * prices.get(product_id, 0.0) for product_id, quantity in units.items()), 2)
+            )
+            for status, (orders, units) in sorted(totals.items())
+        ]
+
+    @staticmethod
+    def _top_products_statement(limit: int) -> Select:
+        units = func.sum(OrderItemSQL.quantity)
+        return (
+            select(OrderItemSQL.product_id, units)
+            .group_by(OrderItemSQL.product_id)
+            .order_by(units.desc(), OrderItemSQL.product_id)
+            .limit(limit)
+        )
+
+    @staticmethod
+    def _status_statement() -> Select:
+        return (
+            select(
+                OrderSQL.status,
+                func.count(distinct(OrderSQL.id)),
+                func.coalesce(func.sum(OrderItemSQL.quantity), 0),
+                func.coalesce(func.sum(OrderItemSQL.quantity * ProductSQL.price), 0.0),
+            )
+            .select_from(OrderSQL)
+            .outerjoin(OrderItemSQL, OrderItemSQL.order_id == OrderSQL.id)
+            .outerjoin(ProductSQL, ProductSQL.id == OrderItemSQL.product_id)
+            .group_by(OrderSQL.status)
+            .order_by(OrderSQL.status)
+        )
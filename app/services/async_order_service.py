@@ -0,0 +1,176 @@
+from typing import AsyncIterator, List, Optional, Tuple, Union
+
+from sqlalchemy import delete, insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.errors import EntityNotFoundError
+from app.models import BulkResult, OrderCreate, OrderResponse
+from app.models.orders import OrderUpdate
+from app.models.sql_models import OrderSQL, OrderItemSQL
+from app.serialization import dumps
+from app.services.async_product_service import AsyncProductService
+from app.services.bulk import chunk_failed
+from app.services.order_service import OrderService, order_loads
+from app.services.store_manager import store
+from app.services.write_behind import status_writer
+
+
+class AsyncOrderService:
+    """
+    Asyncio counterpart of OrderService for DB_ASYNC=true. Memory lookups and
+    the handling of loaded rows are shared with the sync service; only the SQL
+    round trips are awaited.
+    """
+
+    @staticmethod
+    async def create(db: AsyncSession, order_in: OrderCreate) -> OrderResponse:
+        products = await AsyncProductService.get_many(db, OrderService._product_ids(order_in.items))
+        OrderService._check_products(order_in.items, products)
+
+        db_order = OrderSQL(status="Pending")
+        db.add(db_order)
+        await db.flush()
+        order_id = int(db_order.id)
+
+        await db.execute(insert(OrderItemSQL), OrderService._item_values(order_id, order_in.items))
+        await db.commit()
+
+        return OrderService._stored(order_id, "Pending", OrderService._item_responses(order_in.items))
+
+    @staticmethod
+    async def create_many(db: AsyncSession, rows: List[Tuple[int, OrderCreate]]) -> BulkResult:
+        products = await AsyncProductService.get_many(db, (item.product_id for _, order in rows for item in order.items))
+        valid, result = OrderService._split_missing_products(rows, products)
+        if not valid:
+            return result
+
+        try:
+            ids = (await db.scalars(OrderService._bulk_insert_statement(), [{"status": "Pending"}] * len(valid))).all()
+            await db.execute(insert(OrderItemSQL), OrderService._bulk_item_values(ids, valid))
+            await db.commit()
+        except SQLAlchemyError as exc:
+            await db.rollback()
+            result.merge(chunk_failed(valid, exc))
+            return result
+
+        result.merge(OrderService._bulk_created(ids, valid))
+        return result
+
+    @staticmethod
+    async def get_by_id(db: AsyncSession, order_id: int, as_json: bool = False) -> Union[OrderResponse, bytes]:
+        order = OrderService._cached(order_id, as_json)
+        if order:
+            return order
+
+        response = await order_loads.do_async(order_id, lambda: AsyncOrderService._load(db, order_id))
+        return dumps(response) if as_json else response
+
+    @staticmethod
+    async def _load(db: AsyncSession, order_id: int) -> OrderResponse:
+        return OrderService._loaded(order_id, await db.scalar(OrderService._by_id_statement(order_id)))
+
+    @staticmethod
+    async def get_tagged(db: AsyncSession, order_id: int) -> Tuple[Optional[str], bytes]:
+        tagged = OrderService._cached_tagged(order_id)
+        if tagged:
+            return tagged
+        body = await AsyncOrderService.get_by_id(db, order_id, as_json=True)
+        return OrderService._loaded_tagged(order_id, body)
+
+    @staticmethod
+    async def get_all(
+            db: AsyncSession,
+            limit: Optional[int] = None,
+            after: Optional[int] = None,
+            as_json: bool = False,
+            status: Optional[str] = None
+    ) -> Union[List[OrderResponse], bytes]:
+        cached = OrderService._get_all_cached(limit, after, as_json, status)
+        if cached is not None:
+            return cached
+
+        if status is not None:
+            await run_in_threadpool(OrderService._flush_deferred_statuses)
+        db_orders = (await db.scalars(OrderService._listing_statement(limit, after, status))).all()
+        return OrderService._listed(db_orders, as_json, complete=limit is None and after is None and status is None)
+
+    @staticmethod
+    async def get_by_product(
+            db: AsyncSession,
+            product_id: int,
+            limit: Optional[int] = None,
+            after: Optional[int] = None,
+            as_json: bool = False
+    ) -> Union[List[OrderResponse], bytes]:
+        await AsyncProductService.get_by_id(db, product_id)
+
+        cached = OrderService._by_product_cached(product_id, limit, after, as_json)
+        if cached is not None:
+            return cached
+
+        db_orders = (await db.scalars(OrderService._product_orders_statement(product_id, limit, after))).all()
+        return OrderService._listed(db_orders, as_json)
+
+    @staticmethod
+    async def stream(
+            db: AsyncSession,
+            limit: Optional[int] = None,
+            after: Optional[int] = None,
+            chunk_size: int = 500,
+            status: Optional[str] = None
+    ) -> AsyncIterator[OrderResponse]:
+        cached = OrderService._stream_cached(limit, after, chunk_size, status)
+        if cached is not None:
+            for order in cached:
+                yield order
+            return
+
+        if status is not None:
+            await run_in_threadpool(OrderService._flush_deferred_statuses)
+        statement = OrderService._listing_statement(limit, after, status).execution_options(yield_per=chunk_size)
+        async for db_order in await db.stream_scalars(statement):
+            yield OrderService._map_to_response(db_order)
+
+    @staticmethod
+    async def update(db: AsyncSession, order_id: int, order_update: OrderUpdate) -> OrderResponse:
+        deferred_status = order_update.status if status_writer.enabled else None
+        if deferred_status and order_update.items is None:
+            order = await AsyncOrderService.get_by_id(db, order_id)
+            return await run_in_threadpool(OrderService._record_status, order_id, deferred_status, order.items)
+
+        db_order = OrderService._or_404(order_id, await db.scalar(OrderService._by_id_statement(order_id)))
+
+        if order_update.status and not deferred_status:
+            db_order.status = order_update.status
+
+        if order_update.items is not None:
+            products = await AsyncProductService.get_many(db, OrderService._product_ids(order_update.items))
+            OrderService._check_products(order_update.items, products, updating=True)
+
+            await db.execute(delete(OrderItemSQL).where(OrderItemSQL.order_id == order_id))
+            await db.execute(insert(OrderItemSQL), OrderService._item_values(order_id, order_update.items))
+            items = OrderService._item_responses(order_update.items)
+        else:
+            items = OrderService._item_responses(db_order.items)
+
+        status = str(db_order.status)
+        await db.commit()
+
+        if deferred_status:
+            return await run_in_threadpool(OrderService._record_status, order_id, deferred_status, items)
+        return OrderService._stored(order_id, status_writer.pending_status(order_id) or status, items)
+
+    @staticmethod
+    async def delete(db: AsyncSession, order_id: int):
+        store.remove_order(order_id)
+
+        await db.execute(delete(OrderItemSQL).where(OrderItemSQL.order_id == order_id))
+        result = await db.execute(delete(OrderSQL).where(OrderSQL.id == order_id))
+        if result.rowcount == 0:
+            await db.rollback()
+            raise EntityNotFoundError(entity="Order", identifier=str(order_id))
+
+        await db.commit()
+        OrderService._deleted(order_id)
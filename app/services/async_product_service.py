@@ -0,0 +1,109 @@
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import BulkResult, ProductResponse, ProductCreate
+from app.models.sql_models import ProductSQL
+from app.serialization import dumps
+from app.services.bulk import chunk_failed
+from app.services.product_service import ProductService, product_loads
+
+
+class AsyncProductService:
+    """
+    Asyncio counterpart of ProductService for DB_ASYNC=true. Memory lookups and
+    the handling of loaded rows are shared with the sync service; only the SQL
+    round trips are awaited.
+    """
+
+    @staticmethod
+    async def create(db: AsyncSession, product_in: ProductCreate) -> ProductResponse:
+        db_product = ProductSQL(**product_in.model_dump())
+        db.add(db_product)
+        await db.commit()
+
+        return ProductService._created(db_product)
+
+    @staticmethod
+    async def create_many(db: AsyncSession, rows: List[Tuple[int, ProductCreate]]) -> BulkResult:
+        values = [product.model_dump() for _, product in rows]
+        try:
+            ids = (await db.scalars(ProductService._bulk_insert_statement(), values)).all()
+            await db.commit()
+        except SQLAlchemyError as exc:
+            await db.rollback()
+            return chunk_failed(rows, exc)
+
+        return ProductService._bulk_created(ids, values)
+
+    @staticmethod
+    async def get_by_id(db: AsyncSession, product_id: int, as_json: bool = False) -> Union[ProductResponse, bytes]:
+        product = ProductService._cached(product_id, as_json)
+        if product:
+            return product
+
+        response = await product_loads.do_async(product_id, lambda: AsyncProductService._load(db, product_id))
+        return dumps(response) if as_json else response
+
+    @staticmethod
+    async def _load(db: AsyncSession, product_id: int) -> ProductResponse:
+        return ProductService._loaded(product_id, await db.scalar(ProductService._by_id_statement(product_id)))
+
+    @staticmethod
+    async def get_tagged(db: AsyncSession, product_id: int) -> Tuple[Optional[str], bytes]:
+        tagged = ProductService._cached_tagged(product_id)
+        if tagged:
+            return tagged
+        body = await AsyncProductService.get_by_id(db, product_id, as_json=True)
+        return ProductService._loaded_tagged(product_id, body)
+
+    @staticmethod
+    async def get_many(db: AsyncSession, product_ids: Iterable[int]) -> Dict[int, ProductResponse]:
+        found, missing = ProductService._partition_cached(product_ids)
+
+        loaded: List[ProductResponse] = []
+        for chunk in ProductService._id_chunks(missing):
+            db_products = (await db.scalars(ProductService._by_ids_statement(chunk))).all()
+            loaded.extend(ProductService._to_responses(db_products))
+
+        return ProductService._merge_loaded(found, missing, loaded)
+
+    @staticmethod
+    async def search(
+            db: AsyncSession,
+            name_prefix: Optional[str] = None,
+            min_price: Optional[float] = None,
+            max_price: Optional[float] = None,
+            sort: str = "id",
+            limit: int = 50,
+            offset: int = 0,
+            as_json: bool = False
+    ) -> Union[List[ProductResponse], bytes]:
+        cached = ProductService._search_cached(name_prefix, min_price, max_price, sort, limit, offset, as_json)
+        if cached is not None:
+            return cached
+
+        statement = ProductService._search_statement(name_prefix, min_price, max_price, sort, limit, offset)
+        return ProductService._searched((await db.scalars(statement)).all(), as_json)
+
+    @staticmethod
+    async def stream(
+            db: AsyncSession,
+            name_prefix: Optional[str] = None,
+            min_price: Optional[float] = None,
+            max_price: Optional[float] = None,
+            sort: str = "id",
+            limit: Optional[int] = None,
+            offset: int = 0,
+            chunk_size: int = 500
+    ) -> AsyncIterator[ProductResponse]:
+        cached = ProductService._stream_cached(name_prefix, min_price, max_price, sort, limit, offset, chunk_size)
+        if cached is not None:
+            for product in cached:
+                yield product
+            return
+
+        statement = ProductService._search_statement(name_prefix, min_price, max_price, sort, limit, offset)
+        async for db_product in await db.stream_scalars(statement.execution_options(yield_per=chunk_size)):
+            yield ProductService._to_response(db_product)
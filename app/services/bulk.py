@@ -0,0 +1,11 @@
+from typing import List, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models import BulkResult, BulkRowError
+
+
+def chunk_failed(rows: List[Tuple[int, object]], exc: SQLAlchemyError) -> BulkResult:
+    """Reports every row of a bulk chunk the database rejected as a whole."""
+    message = f"Database rejected the batch: {type(getattr(exc, 'orig', None) or exc).__name__}"
+    return BulkResult(errors=[BulkRowError(index=index, message=message) for index, _ in rows])
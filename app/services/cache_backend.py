@@ -0,0 +1,300 @@
+import hashlib
+import mmap
+import os
+import random
+import struct
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import List, Tuple
+
+from app.models import ProductResponse
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+PRODUCT_EVENT = 1
+ORDER_EVENT = 2
+RESET_EVENT = 3
+# Ids created by one bulk chunk, published as a single event whose entity_id
+# packs the first and last id (see pack_id_range).
+PRODUCTS_CREATED_EVENT = 4
+ORDERS_CREATED_EVENT = 5
+
+Event = Tuple[int, int]
+
+
+def pack_id_range(first_id: int, last_id: int) -> int:
+    return first_id << 32 | last_id
+
+
+def unpack_id_range(packed: int) -> Tuple[int, int]:
+    return packed >> 32, packed & 0xFFFFFFFF
+
+
+class CacheBackend:
+    """
+    Extension point that lets several DataStore instances (one per uvicorn
+    worker) share cached data and invalidations. The default implementation
+    shares nothing, which is the behaviour of a single-process deployment.
+
+    `shares_events` tells the DataStore whether every store sees every create.
+    Without it, a store holding the complete catalog or order list cannot tell
+    an unknown id from one created by another worker.
+    """
+
+    shares_events = False
+
+    def get_product(self, product_id: int) -> ProductResponse | None:
+        return None
+
+    def put_product(self, product: ProductResponse):
+        pass
+
+    def publish(self, kind: int, entity_id: int):
+        pass
+
+    def poll(self) -> List[Event]:
+        return []
+
+    def close(self):
+        pass
+
+
+class LocalBackend(CacheBackend):
+    pass
+
+
+class SharedMemoryBackend(CacheBackend):
+    """
+    mmap-backed file shared by every worker on the host. It holds:
+
+    * an open-addressing table of fixed-width product records, written under a
+      cross-process file lock and read lock-free with a per-slot sequence
+      counter (seqlock) so readers retry on torn reads;
+    * a ring buffer of invalidation events. Each backend remembers the last
+      sequence it consumed; if it falls more than one ring behind it receives
+      a RESET_EVENT and must drop its local cache.
+
+    The default path is derived from the database URL, and the header records
+    the table geometry and that URL's hash. Every backend holds a shared lock
+    on a sibling ".users" file; the first one to open the table while nobody
+    else holds it re-initialises it, so records from a previous run or another
+    database are never served. A live table whose header does not match the
+    current settings is rejected.
+    """
+
+    shares_events = True
+    MAGIC = b"DSCACHE2"
+    HEADER = struct.Struct("<8sIIQII8s")
+    RECORD = struct.Struct("<Iqdhh128s512s")
+    EVENT = struct.Struct("<QBqI")
+    SEQ = struct.Struct("<I")
+    MAX_PROBES = 16
+    MAX_READ_RETRIES = 100
+    EMPTY = 0
+    UNREADABLE = (0, EMPTY, 0.0, 0, -1, b"", b"")
+
+    def __init__(self, path: str = "", slots: int = 16384, ring_size: int = 4096, database_url: str = ""):
+        self.db_key = hashlib.blake2b(database_url.encode("utf-8"), digest_size=8).digest()
+        self.path = path or os.path.join(tempfile.gettempdir(), f"datastructures_cache_{self.db_key.hex()}.bin")
+        self.slots, self.ring_size = slots, ring_size
+        self.origin = random.getrandbits(32)
+        self._thread_lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        flags = os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        self._file = os.fdopen(os.open(self.path, flags, 0o600), "r+b")
+        self._users = os.fdopen(os.open(self.path + ".users", flags, 0o600), "r+b") if fcntl else None
+
+        try:
+            with self._exclusive():
+                if self._first_user():
+                    self._file.truncate(0)
+                    self._file.truncate(self._size())
+                    self._file.seek(0)
+                    self._file.write(self._expected_header())
+                    self._file.flush()
+                elif self._read_header() != self._expected_header():
+                    raise RuntimeError(
+                        f"Shared cache {self.path} is in use with another database or table layout "
+                        f"(expected slots={slots}, ring_size={ring_size})"
+                    )
+        except BaseException:
+            self._close_files()
+            raise
+
+        self._map = mmap.mmap(self._file.fileno(), self._size())
+        self._table_offset = self.HEADER.size
+        self._ring_offset = self._table_offset + self.slots * self.RECORD.size
+        self._last_seen = self._event_seq()
+
+    def get_product(self, product_id: int) -> ProductResponse | None:
+        for slot in self._probe(product_id):
+            record = self._read_record(slot)
+            if record[1] == self.EMPTY:
+                return None
+            if record[1] == product_id:
+                return self._decode(record)
+        return None
+
+    def put_product(self, product: ProductResponse):
+        name = product.name.encode("utf-8")
+        description = product.description.encode("utf-8") if product.description is not None else b""
+        if len(name) > 128 or len(description) > 512:
+            return
+
+        with self._exclusive():
+            target = None
+            for slot in self._probe(product.id):
+                record_id = self._read_record_locked(slot)[1]
+                if record_id == product.id or record_id == self.EMPTY:
+                    target = slot
+                    break
+            if target is None:
+                target = product.id % self.slots
+
+            description_len = len(description) if product.description is not None else -1
+            self._write_record(target, product.id, product.price, len(name), description_len, name, description)
+
+    def publish(self, kind: int, entity_id: int):
+        with self._exclusive():
+            seq = self._event_seq() + 1
+            offset = self._ring_offset + (seq % self.ring_size) * self.EVENT.size
+            self.EVENT.pack_into(self._map, offset, seq, kind, entity_id, self.origin)
+            self._set_event_seq(seq)
+            with self._poll_lock:
+                if self._last_seen == seq - 1:
+                    self._last_seen = seq
+
+    def poll(self) -> List[Event]:
+        if self._event_seq() == self._last_seen:
+            return []
+
+        with self._poll_lock:
+            latest = self._event_seq()
+            events: List[Event] = []
+            if latest - self._last_seen > self.ring_size:
+                events.append((RESET_EVENT, 0))
+            else:
+                for seq in range(self._last_seen + 1, latest + 1):
+                    offset = self._ring_offset + (seq % self.ring_size) * self.EVENT.size
+                    event_seq, kind, entity_id, origin = self.EVENT.unpack_from(self._map, offset)
+                    if event_seq != seq:
+                        events = [(RESET_EVENT, 0)]
+                        break
+                    if origin != self.origin:
+                        events.append((kind, entity_id))
+
+            self._last_seen = latest
+            return events
+
+    def close(self):
+        self._map.close()
+        self._close_files()
+
+    def _close_files(self):
+        self._file.close()
+        if self._users is not None:
+            # Closing the descriptor releases this backend's ".users" lock.
+            self._users.close()
+
+    def _size(self) -> int:
+        return self.HEADER.size + self.slots * self.RECORD.size + self.ring_size * self.EVENT.size
+
+    def _first_user(self) -> bool:
+        """Called under _exclusive(); leaves this backend holding a shared ".users" lock."""
+        if not fcntl:
+            # msvcrt has no shared locks: only a missing or foreign header is re-initialised.
+            return self._read_header() is None
+        try:
+            fcntl.flock(self._users.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            first = True
+        except BlockingIOError:
+            first = False
+        fcntl.flock(self._users.fileno(), fcntl.LOCK_SH)
+        return first
+
+    def _expected_header(self) -> bytes:
+        return self.HEADER.pack(
+            self.MAGIC, self.slots, self.ring_size, 0, self.RECORD.size, self.EVENT.size, self.db_key
+        )
+
+    def _read_header(self) -> bytes | None:
+        self._file.seek(0)
+        raw = self._file.read(self.HEADER.size)
+        if len(raw) < self.HEADER.size or raw[:8] != self.MAGIC or os.path.getsize(self.path) < self._size():
+            return None
+        # The event sequence is not part of the table's identity.
+        return raw[:16] + bytes(8) + raw[24:]
+
+    def _event_seq(self) -> int:
+        return struct.unpack_from("<Q", self._map, 16)[0]
+
+    def _set_event_seq(self, seq: int):
+        struct.pack_into("<Q", self._map, 16, seq)
+
+    def _probe(self, product_id: int):
+        home = product_id % self.slots
+        for step in range(min(self.MAX_PROBES, self.slots)):
+            yield (home + step) % self.slots
+
+    def _read_record(self, slot: int) -> tuple:
+        offset = self._table_offset + slot * self.RECORD.size
+        for _ in range(self.MAX_READ_RETRIES):
+            before = self.SEQ.unpack_from(self._map, offset)[0]
+            if before % 2:
+                continue
+            record = self.RECORD.unpack_from(self._map, offset)
+            if record[0] == before and self.SEQ.unpack_from(self._map, offset)[0] == before:
+                return record
+        return self.UNREADABLE
+
+    def _read_record_locked(self, slot: int) -> tuple:
+        return self.RECORD.unpack_from(self._map, self._table_offset + slot * self.RECORD.size)
+
+    def _write_record(self, slot: int, product_id: int, price: float, name_len: int, description_len: int,
+                      name: bytes, description: bytes):
+        offset = self._table_offset + slot * self.RECORD.size
+        writing = (self.SEQ.unpack_from(self._map, offset)[0] | 1) & 0xFFFFFFFF
+        self.SEQ.pack_into(self._map, offset, writing)
+        self.RECORD.pack_into(
+            self._map, offset, writing, product_id, price, name_len, description_len, name, description
+        )
+        self.SEQ.pack_into(self._map, offset, (writing + 1) & 0xFFFFFFFF)
+
+    @staticmethod
+    def _decode(record: tuple) -> ProductResponse:
+        _, product_id, price, name_len, description_len, name, description = record
+        return ProductResponse.model_construct(
+            id=product_id,
+            name=name[:name_len].decode("utf-8"),
+            price=price,
+            description=description[:description_len].decode("utf-8") if description_len >= 0 else None
+        )
+
+    @contextmanager
+    def _exclusive(self):
+        with self._thread_lock:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+                else:
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def create_backend(kind: str, path: str = "", slots: int = 16384, ring_size: int = 4096,
+                   database_url: str = "") -> CacheBackend:
+    if kind == "shared":
+        return SharedMemoryBackend(path=path, slots=slots, ring_size=ring_size, database_url=database_url)
+    return LocalBackend()
@@ -0,0 +1,104 @@
+import heapq
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+from app.models.structures import ListNode
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class OrderAggregates:
+    """
+    Order counts per status and units per product, overall and per status,
+    for the orders currently in the list. The DataStore adds or subtracts each
+    node as it enters, changes or leaves the list, so the totals are always
+    current without scanning. Only exact for the whole table while
+    orders_complete is set.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.orders_by_status: Dict[str, int] = {}
+        self.units_by_status: Dict[str, Dict[int, int]] = {}
+        self.units_by_product: Dict[int, int] = {}
+
+    def add(self, node: ListNode):
+        self._apply(node, 1)
+
+    def remove(self, node: ListNode):
+        self._apply(node, -1)
+
+    def top_products(self, limit: int) -> List[Tuple[int, int]]:
+        """(product_id, units) pairs, most units first and lowest id on ties, in O(n log limit)."""
+        return heapq.nlargest(limit, self.units_by_product.items(), key=lambda entry: (entry[1], -entry[0]))
+
+    def rebuild(self, nodes: Iterable[ListNode]):
+        """
+        Recomputes every total from scratch. Line items are gathered into one
+        columnar int array and summed with NumPy when it is installed, which is
+        what a full reload of the order list goes through.
+        """
+        statuses: List[str] = []
+        item_counts = array("q")
+        items = array("i")
+        for node in nodes:
+            statuses.append(node.status)
+            item_counts.append(len(node.items) // 2)
+            items.extend(node.items)
+
+        self.clear()
+        self.orders_by_status = dict(Counter(statuses))
+        if not items:
+            return
+        if numpy is not None:
+            self._sum_items_vectorized(statuses, item_counts, items)
+            return
+
+        position = 0
+        for status, count in zip(statuses, item_counts):
+            per_status = self.units_by_status.setdefault(status, {})
+            for i in range(position, position + count * 2, 2):
+                _bump(per_status, items[i], items[i + 1])
+                _bump(self.units_by_product, items[i], items[i + 1])
+            position += count * 2
+        self.units_by_status = {status: units for status, units in self.units_by_status.items() if units}
+
+    def _sum_items_vectorized(self, statuses: List[str], item_counts: array, items: array):
+        pairs = numpy.frombuffer(items, dtype=numpy.intc).reshape(-1, 2)
+        status_names, status_codes = numpy.unique(numpy.array(statuses, dtype=object), return_inverse=True)
+        product_ids, product_codes = numpy.unique(pairs[:, 0], return_inverse=True)
+
+        item_status = numpy.repeat(status_codes, numpy.frombuffer(item_counts, dtype=numpy.int64))
+        cells = item_status * len(product_ids) + product_codes
+        totals = numpy.bincount(cells, weights=pairs[:, 1], minlength=len(status_names) * len(product_ids))
+        totals = totals.astype(numpy.int64).reshape(len(status_names), len(product_ids))
+
+        for status, row in zip(status_names.tolist(), totals):
+            present = numpy.flatnonzero(row)
+            if len(present):
+                self.units_by_status[status] = dict(zip(product_ids[present].tolist(), row[present].tolist()))
+        self.units_by_product = dict(zip(product_ids.tolist(), totals.sum(axis=0).tolist()))
+
+    def _apply(self, node: ListNode, sign: int):
+        _bump(self.orders_by_status, node.status, sign)
+        per_status = self.units_by_status.setdefault(node.status, {})
+        items = node.items
+        for i in range(0, len(items), 2):
+            _bump(per_status, items[i], items[i + 1] * sign)
+            _bump(self.units_by_product, items[i], items[i + 1] * sign)
+        if not per_status:
+            del self.units_by_status[node.status]
+
+
+def _bump(totals: dict, key, delta: int):
+    value = totals.get(key, 0) + delta
+    if value:
+        totals[key] = value
+    else:
+        totals.pop(key, None)
@@ -1,132 +1,403 @@
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
 
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, delete, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, selectinload
 
 from app.errors import EntityNotFoundError, BusinessRuleError
-from app.models import OrderCreate, OrderResponse
-from app.models.orders import OrderUpdate, OrderItemResponse
+from app.metrics import timed
+from app.models import BulkResult, BulkRowError, OrderCreate, OrderResponse
+from app.models.orders import OrderUpdate, OrderItemCreate, OrderItemResponse
 from app.models.sql_models import OrderSQL, OrderItemSQL
+from app.serialization import dumps
+from app.services.bulk import chunk_failed
 from app.services.product_service import ProductService
+from app.services.single_flight import SingleFlight
 from app.services.store_manager import store
+from app.services.write_behind import status_writer
+
+# Concurrent misses on one order share a single SQL lookup.
+order_loads = SingleFlight("order")
 
 
 class OrderService:
 
     @staticmethod
     def create(db: Session, order_in: OrderCreate) -> OrderResponse:
-        for item in order_in.items:
-            try:
-                ProductService.get_by_id(db, item.product_id)
-            except EntityNotFoundError:
-                raise BusinessRuleError(
-                    message=f"Product with ID {item.product_id} does not exist. Cannot create order."
-                )
+        products = ProductService.get_many(db, OrderService._product_ids(order_in.items))
+        OrderService._check_products(order_in.items, products)
 
         db_order = OrderSQL(status="Pending")
         db.add(db_order)
+        db.flush()
+        order_id = int(db_order.id)
+
+        db.execute(insert(OrderItemSQL), OrderService._item_values(order_id, order_in.items))
         db.commit()
-        db.refresh(db_order)
 
-        for item in order_in.items:
-            db_item = OrderItemSQL(
-                order_id=db_order.id,
-                product_id=item.product_id,
-                quantity=item.quantity
-            )
-            db.add(db_item)
+        return OrderService._stored(order_id, "Pending", OrderService._item_responses(order_in.items))
 
-        db.commit()
-        db.refresh(db_order)
+    @staticmethod
+    def create_many(db: Session, rows: List[Tuple[int, OrderCreate]]) -> BulkResult:
+        """
+        Creates a chunk of orders: product ids are checked with one batched lookup,
+        then orders and items are inserted with two executemany calls and one commit.
+        """
+        products = ProductService.get_many(db, (item.product_id for _, order in rows for item in order.items))
+        valid, result = OrderService._split_missing_products(rows, products)
+        if not valid:
+            return result
+
+        try:
+            ids = db.scalars(OrderService._bulk_insert_statement(), [{"status": "Pending"}] * len(valid)).all()
+            db.execute(insert(OrderItemSQL), OrderService._bulk_item_values(ids, valid))
+            db.commit()
+        except SQLAlchemyError as exc:
+            db.rollback()
+            result.merge(chunk_failed(valid, exc))
+            return result
+
+        result.merge(OrderService._bulk_created(ids, valid))
+        return result
 
-        response = OrderService._map_to_response(db_order)
-        store.add_order(response)
+    @staticmethod
+    def get_by_id(db: Session, order_id: int, as_json: bool = False) -> Union[OrderResponse, bytes]:
+        order = OrderService._cached(order_id, as_json)
+        if order:
+            return order
 
-        return response
+        response = order_loads.do(order_id, lambda: OrderService._load(db, order_id))
+        return dumps(response) if as_json else response
 
     @staticmethod
-    def get_by_id(db: Session, order_id: int) -> OrderResponse:
-        order = store.get_order(order_id)
+    def _load(db: Session, order_id: int) -> OrderResponse:
+        return OrderService._loaded(order_id, db.scalar(OrderService._by_id_statement(order_id)))
+
+    @staticmethod
+    def _cached(order_id: int, as_json: bool = False) -> Union[OrderResponse, bytes, None]:
+        """The cached order, None if SQL must be asked, or NotFound if it is known to be absent."""
+        with timed("memory"):
+            order = store.get_order(order_id, as_json)
         if order:
             return order
+        if store.is_missing_order(order_id):
+            raise EntityNotFoundError(entity="Order", identifier=str(order_id))
+        return None
 
-        db_order = OrderService._get_order_sql_or_404(db, order_id)
+    @staticmethod
+    def _loaded(order_id: int, db_order: Optional[OrderSQL]) -> OrderResponse:
+        if not db_order:
+            store.remember_missing_orders([order_id])
+            raise EntityNotFoundError(entity="Order", identifier=str(order_id))
 
-        response = OrderService._map_to_response(db_order)
+        with timed("serialize"):
+            response = OrderService._map_to_response(db_order)
         store.add_order(response)
-
         return response
 
     @staticmethod
-    def get_all(db: Session) -> List[OrderResponse]:
-        if not store.orders_head:
-            db_orders: List[OrderSQL] = db.query(OrderSQL).all()
+    def get_etag(order_id: int) -> Optional[str]:
+        """ETag of the order if it is cached, without querying SQL."""
+        tagged = store.tagged_order(order_id, encode=False, count=False)
+        return tagged[0] if tagged else None
 
-            for db_o in db_orders:
-                response = OrderService._map_to_response(db_o)
-                store.add_order(response)
+    @staticmethod
+    def get_tagged(db: Session, order_id: int) -> Tuple[Optional[str], bytes]:
+        """
+        The ETag and encoded response of an order, loading it into memory on a
+        miss. The ETag is None if the order could not be kept in memory.
+        """
+        tagged = OrderService._cached_tagged(order_id)
+        if tagged:
+            return tagged
+        body = OrderService.get_by_id(db, order_id, as_json=True)
+        return OrderService._loaded_tagged(order_id, body)
 
-        return store.get_all_orders()
+    @staticmethod
+    def _cached_tagged(order_id: int) -> Optional[Tuple[str, bytes]]:
+        with timed("memory"):
+            return store.tagged_order(order_id)
 
     @staticmethod
-    def update(db: Session, order_id: int, order_update: OrderUpdate) -> OrderResponse:
-        db_order = OrderService._get_order_sql_or_404(db, order_id)
+    def _loaded_tagged(order_id: int, body: bytes) -> Tuple[Optional[str], bytes]:
+        return store.tagged_order(order_id, count=False) or (None, body)
+
+    @staticmethod
+    def get_all(
+            db: Session,
+            limit: Optional[int] = None,
+            after: Optional[int] = None,
+            as_json: bool = False,
+            status: Optional[str] = None
+    ) -> Union[List[OrderResponse], bytes]:
+        cached = OrderService._get_all_cached(limit, after, as_json, status)
+        if cached is not None:
+            return cached
+
+        if status is not None:
+            OrderService._flush_deferred_statuses()
+        db_orders = db.scalars(OrderService._listing_statement(limit, after, status)).all()
+        return OrderService._listed(db_orders, as_json, complete=limit is None and after is None and status is None)
+
+    @staticmethod
+    def get_by_product(
+            db: Session,
+            product_id: int,
+            limit: Optional[int] = None,
+            after: Optional[int] = None,
+            as_json: bool = False
+    ) -> Union[List[OrderResponse], bytes]:
+        """
+        Orders containing a product, sorted by id with the same keyset cursor as
+        get_all. Uses the store's product posting lists once every order is
+        cached, otherwise the order_items(product_id) index.
+        """
+        ProductService.get_by_id(db, product_id)
+
+        cached = OrderService._by_product_cached(product_id, limit, after, as_json)
+        if cached is not None:
+            return cached
+
+        db_orders = db.scalars(OrderService._product_orders_statement(product_id, limit, after)).all()
+        return OrderService._listed(db_orders, as_json)
 
-        if order_update.status:
+    @staticmethod
+    def stream(
+            db: Session,
+            limit: Optional[int] = None,
+            after: Optional[int] = None,
+            chunk_size: int = 500,
+            status: Optional[str] = None
+    ) -> Iterator[OrderResponse]:
+        """
+        Yields the listing one order at a time: page by page from the Linked List
+        when it holds every order, otherwise through a server-side cursor that
+        fetches chunk_size orders and their items per round trip. Streamed
+        orders are not cached.
+        """
+        cached = OrderService._stream_cached(limit, after, chunk_size, status)
+        if cached is not None:
+            yield from cached
+            return
+
+        if status is not None:
+            OrderService._flush_deferred_statuses()
+        statement = OrderService._listing_statement(limit, after, status).execution_options(yield_per=chunk_size)
+        for db_order in db.scalars(statement):
+            yield OrderService._map_to_response(db_order)
+
+    @staticmethod
+    def update(db: Session, order_id: int, order_update: OrderUpdate) -> OrderResponse:
+        """
+        With write-behind enabled status changes only go through its journal, so
+        a later flush never overwrites a newer status; a status-only update then
+        skips SQL entirely when the order is cached.
+        """
+        deferred_status = order_update.status if status_writer.enabled else None
+        if deferred_status and order_update.items is None:
+            order = OrderService.get_by_id(db, order_id)
+            return OrderService._record_status(order_id, deferred_status, order.items)
+
+        db_order = OrderService._or_404(order_id, db.scalar(OrderService._by_id_statement(order_id)))
+
+        if order_update.status and not deferred_status:
             db_order.status = order_update.status
 
         if order_update.items is not None:
-            for item in order_update.items:
-                try:
-                    ProductService.get_by_id(db, item.product_id)
-                except EntityNotFoundError:
-                    raise BusinessRuleError(f"Product ID {item.product_id} invalid.")
-
-            db.query(OrderItemSQL).filter(OrderItemSQL.order_id == order_id).delete()
-
-            for item in order_update.items:
-                new_db_item = OrderItemSQL(
-                    order_id=order_id,
-                    product_id=item.product_id,
-                    quantity=item.quantity
-                )
-                db.add(new_db_item)
+            products = ProductService.get_many(db, OrderService._product_ids(order_update.items))
+            OrderService._check_products(order_update.items, products, updating=True)
 
+            db.execute(delete(OrderItemSQL).where(OrderItemSQL.order_id == order_id))
+            db.execute(insert(OrderItemSQL), OrderService._item_values(order_id, order_update.items))
+            items = OrderService._item_responses(order_update.items)
+        else:
+            items = OrderService._item_responses(db_order.items)
+
+        status = str(db_order.status)
         db.commit()
-        db.refresh(db_order)
 
-        response = OrderService._map_to_response(db_order)
-        store.add_order(response)
+        if deferred_status:
+            return OrderService._record_status(order_id, deferred_status, items)
+        return OrderService._stored(order_id, status_writer.pending_status(order_id) or status, items)
 
+    @staticmethod
+    def _record_status(order_id: int, status: str, items: List[OrderItemResponse]) -> OrderResponse:
+        status_writer.record(order_id, status)
+        response = OrderResponse.model_construct(id=order_id, status=status, items=items)
+        store.add_order(response)
+        store.publish_order(order_id)
         return response
 
     @staticmethod
     def delete(db: Session, order_id: int):
         store.remove_order(order_id)
 
-        db_order = OrderService._get_order_sql_or_404(db, order_id)
+        db_order = OrderService._or_404(order_id, db.scalar(OrderService._by_id_statement(order_id)))
 
         db.delete(db_order)
         db.commit()
+        OrderService._deleted(order_id)
+
+    @staticmethod
+    def _stored(order_id: int, status: str, items: List[OrderItemResponse]) -> OrderResponse:
+        response = OrderResponse(id=order_id, status=status, items=items)
+        store.add_order(response)
+        store.publish_order(order_id)
+        return response
 
     @staticmethod
-    def _get_order_sql_or_404(db: Session, order_id: int) -> OrderSQL:
-        db_order: Optional[OrderSQL] = db.query(OrderSQL).filter(OrderSQL.id == order_id).first()
+    def _deleted(order_id: int):
+        store.remember_missing_orders([order_id])
+        store.publish_order(order_id)
 
+    @staticmethod
+    def _product_ids(items: List[OrderItemCreate]) -> List[int]:
+        return [item.product_id for item in items]
+
+    @staticmethod
+    def _check_products(items: List[OrderItemCreate], products: dict, updating: bool = False):
+        missing_id = next((item.product_id for item in items if item.product_id not in products), None)
+        if missing_id is None:
+            return
+        if updating:
+            raise BusinessRuleError(f"Product ID {missing_id} invalid.")
+        raise BusinessRuleError(message=f"Product with ID {missing_id} does not exist. Cannot create order.")
+
+    @staticmethod
+    def _item_responses(items: Iterable[Union[OrderItemCreate, OrderItemSQL]]) -> List[OrderItemResponse]:
+        return [OrderItemResponse(product_id=i.product_id, quantity=i.quantity) for i in items]
+
+    @staticmethod
+    def _split_missing_products(rows: List[Tuple[int, OrderCreate]], products: dict) -> Tuple[list, BulkResult]:
+        valid = []
+        result = BulkResult()
+        for index, order in rows:
+            missing_id = next((i.product_id for i in order.items if i.product_id not in products), None)
+            if missing_id is None:
+                valid.append((index, order))
+            else:
+                result.errors.append(BulkRowError(index=index, message=f"Product with ID {missing_id} does not exist."))
+        return valid, result
+
+    @staticmethod
+    def _bulk_insert_statement():
+        return insert(OrderSQL).returning(OrderSQL.id, sort_by_parameter_order=True)
+
+    @staticmethod
+    def _bulk_item_values(ids: List[int], valid: List[Tuple[int, OrderCreate]]) -> List[dict]:
+        return [
+            {"order_id": order_id, "product_id": item.product_id, "quantity": item.quantity}
+            for order_id, (_, order) in zip(ids, valid)
+            for item in order.items
+        ]
+
+    @staticmethod
+    def _bulk_created(ids: List[int], valid: List[Tuple[int, OrderCreate]]) -> BulkResult:
+        orders = [
+            OrderResponse(id=order_id, status="Pending", items=OrderService._item_responses(order.items))
+            for order_id, (_, order) in zip(ids, valid)
+        ]
+        store.add_orders(orders)
+        store.publish_created_orders(ids)
+        return BulkResult(created=len(orders), ids=list(ids))
+
+    @staticmethod
+    def _get_all_cached(
+            limit: Optional[int],
+            after: Optional[int],
+            as_json: bool = False,
+            status: Optional[str] = None
+    ) -> Union[List[OrderResponse], bytes, None]:
+        store.sync()
+        if not store.orders_complete:
+            return None
+
+        with timed("memory"):
+            if limit is None and after is None and status is None:
+                return store.get_all_orders(as_json)
+            return store.get_orders_page(after, limit, as_json, status)
+
+    @staticmethod
+    def _by_product_cached(
+            product_id: int,
+            limit: Optional[int],
+            after: Optional[int],
+            as_json: bool = False
+    ) -> Union[List[OrderResponse], bytes, None]:
+        store.sync()
+        if not store.orders_complete:
+            return None
+
+        with timed("memory"):
+            return store.get_orders_by_product(product_id, after, limit, as_json)
+
+    @staticmethod
+    def _stream_cached(
+            limit: Optional[int],
+            after: Optional[int],
+            chunk_size: int,
+            status: Optional[str]
+    ) -> Optional[Iterator[OrderResponse]]:
+        store.sync()
+        if not store.orders_complete:
+            return None
+        return store.iter_orders(after, limit, chunk_size, status)
+
+    @staticmethod
+    def _listed(db_orders: List[OrderSQL], as_json: bool, complete: bool = False) -> Union[List[OrderResponse], bytes]:
+        with timed("serialize"):
+            responses = [OrderService._map_to_response(db_o) for db_o in db_orders]
+        store.add_orders(responses, complete=complete)
+        return dumps(responses) if as_json else responses
+
+    @staticmethod
+    def _flush_deferred_statuses():
+        """Statuses still queued by the write-behind must reach SQL before it filters or groups by them."""
+        if status_writer.enabled:
+            status_writer.flush()
+
+    @staticmethod
+    def _listing_statement(limit: Optional[int], after: Optional[int], status: Optional[str] = None) -> Select:
+        statement = select(OrderSQL).options(selectinload(OrderSQL.items)).order_by(OrderSQL.id)
+        if status is not None:
+            statement = statement.where(OrderSQL.status == status)
+        if after is not None:
+            statement = statement.where(OrderSQL.id > after)
+        if limit is not None:
+            statement = statement.limit(limit)
+        return statement
+
+    @staticmethod
+    def _item_values(order_id: int, items: List[OrderItemCreate]) -> List[dict]:
+        return [{"order_id": order_id, "product_id": i.product_id, "quantity": i.quantity} for i in items]
+
+    @staticmethod
+    def _by_id_statement(order_id: int) -> Select:
+        # Items are loaded eagerly since the async session cannot lazy-load them.
+        return select(OrderSQL).options(selectinload(OrderSQL.items)).where(OrderSQL.id == order_id)
+
+    @staticmethod
+    def _or_404(order_id: int, db_order: Optional[OrderSQL]) -> OrderSQL:
         if not db_order:
             raise EntityNotFoundError(entity="Order", identifier=str(order_id))
         return db_order
 
+    @staticmethod
+    def _product_orders_statement(product_id: int, limit: Optional[int], after: Optional[int]) -> Select:
+        order_ids = select(OrderItemSQL.order_id).where(OrderItemSQL.product_id == product_id)
+        return OrderService._listing_statement(limit, after).where(OrderSQL.id.in_(order_ids))
+
     @staticmethod
     def _map_to_response(db_order: OrderSQL) -> OrderResponse:
         sql_items = list(db_order.items) if db_order.items else []
 
         items_pydantic = [
-            OrderItemResponse(product_id=i.product_id, quantity=i.quantity)
+            OrderItemResponse.model_construct(product_id=i.product_id, quantity=i.quantity)
             for i in sql_items
         ]
 
-        return OrderResponse(
+        return OrderResponse.model_construct(
             id=int(db_order.id),
-            status=str(db_order.status),
+            status=status_writer.pending_status(db_order.id) or str(db_order.status),
             items=items_pydantic
         )
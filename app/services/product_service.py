@@ -1,9 +1,24 @@
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from sqlalchemy import Select, insert, select
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
+
 from app.errors import EntityNotFoundError
-from app.models import ProductResponse, ProductCreate
+from app.metrics import timed
+from app.models import BulkResult, ProductResponse, ProductCreate
 from app.models.sql_models import ProductSQL
+from app.serialization import dumps
+from app.services.bulk import chunk_failed
+from app.services.single_flight import SingleFlight
 from app.services.store_manager import store
 
+# SQL Server accepts at most 2100 parameters per statement.
+IN_CLAUSE_CHUNK_SIZE = 2000
+
+# Concurrent misses on one product share a single SQL lookup.
+product_loads = SingleFlight("product")
+
 
 class ProductService:
     @staticmethod
@@ -14,24 +29,267 @@ class ProductService:
         db.commit()
         db.refresh(db_product)
 
-        response = ProductResponse.model_validate(db_product)
+        return ProductService._created(db_product)
 
-        store.insert_product(response)
+    @staticmethod
+    def create_many(db: Session, rows: List[Tuple[int, ProductCreate]]) -> BulkResult:
+        """
+        Inserts a chunk of validated rows with one executemany and one commit.
+        A database error rejects the whole chunk, reported row by row.
+        """
+        values = [product.model_dump() for _, product in rows]
+        try:
+            ids = db.scalars(ProductService._bulk_insert_statement(), values).all()
+            db.commit()
+        except SQLAlchemyError as exc:
+            db.rollback()
+            return chunk_failed(rows, exc)
 
-        return response
+        return ProductService._bulk_created(ids, values)
 
     @staticmethod
-    def get_by_id(db: Session, product_id: int) -> ProductResponse:
-        product = store.find_product(product_id)
+    def get_by_id(db: Session, product_id: int, as_json: bool = False) -> Union[ProductResponse, bytes]:
+        product = ProductService._cached(product_id, as_json)
         if product:
             return product
 
-        db_product = db.query(ProductSQL).filter(ProductSQL.id == product_id).first()
+        response = product_loads.do(product_id, lambda: ProductService._load(db, product_id))
+        return dumps(response) if as_json else response
+
+    @staticmethod
+    def _load(db: Session, product_id: int) -> ProductResponse:
+        return ProductService._loaded(product_id, db.scalar(ProductService._by_id_statement(product_id)))
 
+    @staticmethod
+    def _cached(product_id: int, as_json: bool = False) -> Union[ProductResponse, bytes, None]:
+        """The cached product, None if SQL must be asked, or NotFound if it is known to be absent."""
+        with timed("memory"):
+            product = store.find_product(product_id, as_json)
+        if product:
+            return product
+        if store.is_missing_product(product_id):
+            raise EntityNotFoundError(entity="Product", identifier=str(product_id))
+        return None
+
+    @staticmethod
+    def _loaded(product_id: int, db_product: Optional[ProductSQL]) -> ProductResponse:
         if not db_product:
+            store.remember_missing_products([product_id])
             raise EntityNotFoundError(entity="Product", identifier=str(product_id))
 
-        response = ProductResponse.model_validate(db_product)
+        with timed("serialize"):
+            response = ProductService._to_response(db_product)
         store.insert_product(response)
+        return response
+
+    @staticmethod
+    def get_etag(product_id: int) -> Optional[str]:
+        """ETag of the product if it is cached, without querying SQL."""
+        tagged = store.tagged_product(product_id, encode=False, count=False)
+        return tagged[0] if tagged else None
+
+    @staticmethod
+    def get_tagged(db: Session, product_id: int) -> Tuple[Optional[str], bytes]:
+        """
+        The ETag and encoded response of a product, loading it into memory on a
+        miss. The ETag is None if the product could not be kept in memory.
+        """
+        tagged = ProductService._cached_tagged(product_id)
+        if tagged:
+            return tagged
+        body = ProductService.get_by_id(db, product_id, as_json=True)
+        return ProductService._loaded_tagged(product_id, body)
+
+    @staticmethod
+    def _cached_tagged(product_id: int) -> Optional[Tuple[str, bytes]]:
+        with timed("memory"):
+            return store.tagged_product(product_id)
+
+    @staticmethod
+    def _loaded_tagged(product_id: int, body: bytes) -> Tuple[Optional[str], bytes]:
+        return store.tagged_product(product_id, count=False) or (None, body)
+
+    @staticmethod
+    def get_many(db: Session, product_ids: Iterable[int]) -> Dict[int, ProductResponse]:
+        found, missing = ProductService._partition_cached(product_ids)
+
+        loaded: List[ProductResponse] = []
+        for chunk in ProductService._id_chunks(missing):
+            loaded.extend(ProductService._to_responses(db.scalars(ProductService._by_ids_statement(chunk)).all()))
+
+        return ProductService._merge_loaded(found, missing, loaded)
+
+    @staticmethod
+    def _partition_cached(product_ids: Iterable[int]) -> Tuple[Dict[int, ProductResponse], List[int]]:
+        """Splits ids into the cached products and the ids SQL must be asked for."""
+        found: Dict[int, ProductResponse] = {}
+        missing: List[int] = []
+
+        with timed("memory"):
+            for product_id in dict.fromkeys(product_ids):
+                product = store.find_product(product_id)
+                if product:
+                    found[product_id] = product
+                elif not store.is_missing_product(product_id):
+                    missing.append(product_id)
+        return found, missing
+
+    @staticmethod
+    def _id_chunks(product_ids: List[int]) -> Iterator[List[int]]:
+        for start in range(0, len(product_ids), IN_CLAUSE_CHUNK_SIZE):
+            yield product_ids[start:start + IN_CLAUSE_CHUNK_SIZE]
 
+    @staticmethod
+    def _merge_loaded(
+            found: Dict[int, ProductResponse],
+            missing: List[int],
+            loaded: List[ProductResponse]
+    ) -> Dict[int, ProductResponse]:
+        if loaded:
+            store.insert_products(loaded)
+            found.update((p.id, p) for p in loaded)
+        if len(loaded) < len(missing):
+            store.remember_missing_products(p for p in missing if p not in found)
+        return found
+
+    @staticmethod
+    def search(
+            db: Session,
+            name_prefix: Optional[str] = None,
+            min_price: Optional[float] = None,
+            max_price: Optional[float] = None,
+            sort: str = "id",
+            limit: int = 50,
+            offset: int = 0,
+            as_json: bool = False
+    ) -> Union[List[ProductResponse], bytes]:
+        cached = ProductService._search_cached(name_prefix, min_price, max_price, sort, limit, offset, as_json)
+        if cached is not None:
+            return cached
+
+        statement = ProductService._search_statement(name_prefix, min_price, max_price, sort, limit, offset)
+        return ProductService._searched(db.scalars(statement).all(), as_json)
+
+    @staticmethod
+    def stream(
+            db: Session,
+            name_prefix: Optional[str] = None,
+            min_price: Optional[float] = None,
+            max_price: Optional[float] = None,
+            sort: str = "id",
+            limit: Optional[int] = None,
+            offset: int = 0,
+            chunk_size: int = 500
+    ) -> Iterator[ProductResponse]:
+        """
+        Yields every match of a search one by one. Reads the memory indexes chunk
+        by chunk when the catalog is cached, otherwise keeps a server-side cursor
+        open fetching chunk_size rows at a time. Streamed rows are not cached.
+        """
+        cached = ProductService._stream_cached(name_prefix, min_price, max_price, sort, limit, offset, chunk_size)
+        if cached is not None:
+            yield from cached
+            return
+
+        statement = ProductService._search_statement(name_prefix, min_price, max_price, sort, limit, offset)
+        for db_product in db.scalars(statement.execution_options(yield_per=chunk_size)):
+            yield ProductService._to_response(db_product)
+
+    @staticmethod
+    def _search_cached(
+            name_prefix: Optional[str],
+            min_price: Optional[float],
+            max_price: Optional[float],
+            sort: str,
+            limit: int,
+            offset: int,
+            as_json: bool = False
+    ) -> Union[List[ProductResponse], bytes, None]:
+        store.sync()
+        if not store.products_complete:
+            return None
+
+        with timed("memory"):
+            return store.search_products(name_prefix, min_price, max_price, sort, offset, limit, as_json)
+
+    @staticmethod
+    def _searched(db_products: List[ProductSQL], as_json: bool) -> Union[List[ProductResponse], bytes]:
+        products = ProductService._to_responses(db_products)
+        if products:
+            store.insert_products(products)
+        return dumps(products) if as_json else products
+
+    @staticmethod
+    def _stream_cached(
+            name_prefix: Optional[str],
+            min_price: Optional[float],
+            max_price: Optional[float],
+            sort: str,
+            limit: Optional[int],
+            offset: int,
+            chunk_size: int
+    ) -> Optional[Iterator[ProductResponse]]:
+        store.sync()
+        if not store.products_complete:
+            return None
+        return store.iter_products(name_prefix, min_price, max_price, sort, offset, limit, chunk_size)
+
+    @staticmethod
+    def _by_id_statement(product_id: int) -> Select:
+        return select(ProductSQL).where(ProductSQL.id == product_id)
+
+    @staticmethod
+    def _by_ids_statement(product_ids: List[int]) -> Select:
+        return select(ProductSQL).where(ProductSQL.id.in_(product_ids))
+
+    @staticmethod
+    def _search_statement(
+            name_prefix: Optional[str],
+            min_price: Optional[float],
+            max_price: Optional[float],
+            sort: str,
+            limit: Optional[int],
+            offset: int
+    ) -> Select:
+        statement = select(ProductSQL)
+        if name_prefix:
+            statement = statement.where(ProductSQL.name.startswith(name_prefix, autoescape=True))
+        if min_price is not None:
+            statement = statement.where(ProductSQL.price >= min_price)
+        if max_price is not None:
+            statement = statement.where(ProductSQL.price <= max_price)
+
+        column = getattr(ProductSQL, sort.lstrip("-"))
+        order = [column.desc(), ProductSQL.id.desc()] if sort.startswith("-") else [column, ProductSQL.id]
+        return statement.order_by(*order).offset(offset).limit(limit)
+
+    @staticmethod
+    def _to_response(db_product: ProductSQL) -> ProductResponse:
+        """Builds the response without revalidating a row that was validated on the way in."""
+        return ProductResponse.model_construct(
+            id=db_product.id, name=db_product.name, price=db_product.price, description=db_product.description
+        )
+
+    @staticmethod
+    def _to_responses(db_products: Iterable[ProductSQL]) -> List[ProductResponse]:
+        with timed("serialize"):
+            return [ProductService._to_response(p) for p in db_products]
+
+    @staticmethod
+    def _created(db_product: ProductSQL) -> ProductResponse:
+        response = ProductService._to_response(db_product)
+        store.insert_product(response)
+        store.publish_product(response.id)
         return response
+
+    @staticmethod
+    def _bulk_insert_statement():
+        return insert(ProductSQL).returning(ProductSQL.id, sort_by_parameter_order=True)
+
+    @staticmethod
+    def _bulk_created(ids: List[int], values: List[dict]) -> BulkResult:
+        products = [ProductResponse.model_construct(id=product_id, **v) for product_id, v in zip(ids, values)]
+        store.insert_products(products)
+        store.publish_created_products(ids)
+        return BulkResult(created=len(products), ids=list(ids))
+
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+from app.metrics import registry
+
+T = TypeVar("T")
+
+registry.describe("app_single_flight_shared_total", "Cache misses served by another request's load of the same key.")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent loads of the same key: the first caller runs the
+    loader, callers arriving while it runs wait for it and get its result or
+    its exception. Nothing is kept once the load finishes, so a later miss
+    loads again.
+
+    do() is for the threadpool running the sync endpoints; do_async() for
+    coroutines on the event loop, which it never blocks. A waiting coroutine
+    whose loader is cancelled (e.g. the client went away) retries the load
+    itself instead of failing.
+    """
+
+    def __init__(self, name: str):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+        self._shared = registry.counter("app_single_flight_shared_total", kind=name)
+
+    def do(self, key: Hashable, loader: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            self._shared.inc()
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = loader()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key: Hashable, loader: Callable[[], Awaitable[T]]) -> T:
+        while (future := self._futures.get(key)) is not None:
+            self._shared.inc()
+            try:
+                # Shielded so that cancelling this waiter leaves the shared load alone.
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+
+        future = self._futures[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Marks the exception as retrieved when nobody was waiting.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._futures[key]
@@ -1,93 +1,1017 @@
-from typing import List
+import math
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from operator import attrgetter
+from typing import Dict, Iterable, Iterator, List, Tuple
 
 from app.models import ProductResponse, OrderResponse
 from app.models.structures import BSTNode, ListNode
+from app.serialization import dumps, etag, json_array
+from app.services.cache_backend import CacheBackend, LocalBackend, create_backend, pack_id_range, unpack_id_range, \
+    PRODUCT_EVENT, ORDER_EVENT, RESET_EVENT, PRODUCTS_CREATED_EVENT, ORDERS_CREATED_EVENT
+from app.services.locks import RWLock
+from app.services.order_aggregates import OrderAggregates
+from app.settings import get_settings
 
+settings = get_settings()
+
+# Smallest batch of new products that _insert_many merges in one pass.
+BULK_MERGE_MIN = 256
+_name_key = attrgetter("name", "id")
+_price_key = attrgetter("price", "id")
+
+
+class CacheStats:
+    __slots__ = ("hits", "misses", "negative_hits", "evictions", "expirations")
 
-class DataStore:
     def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class DataStore:
+    """
+    In-memory cache of products (AVL tree) and orders (doubly linked list).
+
+    Safe to share between the threadpool workers that run the sync endpoints:
+    lookups run concurrently under the read side of an RWLock, mutations take
+    the write side. LRU bookkeeping and counters touched by readers are guarded
+    by a separate short-lived mutex.
+
+    A CacheBackend shares products and invalidations with the stores of other
+    worker processes; pending invalidations are applied before every read.
+
+    ETags are a hash of the encoded response, so an unchanged entry keeps its
+    tag across workers, restarts and reloads after eviction or expiry.
+    """
+
+    def __init__(
+            self,
+            max_products: int = 0,
+            max_orders: int = 0,
+            max_bytes: int = 0,
+            ttl_seconds: float = 0,
+            backend: CacheBackend | None = None,
+            negative_max_entries: int = 10000,
+            negative_ttl_seconds: float = 30,
+            cache_json: bool = True
+    ):
+        self.max_products = max_products
+        self.max_orders = max_orders
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.negative_max_entries = negative_max_entries
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.cache_json = cache_json
+        self.backend = backend or LocalBackend()
+        self._lock = RWLock()
+        self._touch_lock = threading.Lock()
+        self._reset()
+
+    def clear(self):
+        with self._lock.write():
+            self._reset()
+
+    def _reset(self):
+        self.product_stats = CacheStats()
+        self.order_stats = CacheStats()
+        self._reset_products()
+        self._reset_orders()
+
+    def _reset_products(self):
         self.products_root: BSTNode | None = None
+        self.products_complete = False
+        # Secondary indexes as parallel sorted arrays (keys for bisect, nodes for
+        # the result). Keys carry the product id so that equal names or prices
+        # still give every node a unique position. Names are stored title-cased
+        # by ProductBase, so a title-cased prefix matches them case-insensitively
+        # without keeping a lower-cased copy of every name.
+        self._name_keys: List[Tuple[str, int]] = []
+        self._name_nodes: List[BSTNode] = []
+        self._price_keys: List[Tuple[float, int]] = []
+        self._price_nodes: List[BSTNode] = []
+        self._product_entries: OrderedDict[int, BSTNode] = OrderedDict()
+        self._product_bytes = 0
+        # Ids recently confirmed absent in SQL, mapped to their expiry time.
+        self._missing_products: OrderedDict[int, float] = OrderedDict()
+
+    def _reset_orders(self):
         self.orders_head: ListNode | None = None
+        self.orders_tail: ListNode | None = None
+        self.orders_complete = False
+        self._orders_index: OrderedDict[int, ListNode] = OrderedDict()
+        # Ids of the list in ascending order, to find an insert position or a
+        # cursor's successor by bisection instead of walking the list.
+        self._order_ids = array("i")
+        self._order_bytes = 0
+        self._order_aggregates = OrderAggregates()
+        # Posting lists of ascending order ids: per product contained and per status.
+        self._orders_by_product: Dict[int, List[int]] = {}
+        self._orders_by_status: Dict[str, List[int]] = {}
+        self._missing_orders: OrderedDict[int, float] = OrderedDict()
+
+    def sync(self):
+        events = self.backend.poll()
+        if not events:
+            return
+
+        with self._lock.write():
+            for kind, entity_id in events:
+                if kind == RESET_EVENT:
+                    self._reset_products()
+                    self._reset_orders()
+                elif kind == PRODUCT_EVENT:
+                    self._missing_products.pop(entity_id, None)
+                    was_cached = self._remove_product(entity_id)
+                    if was_cached or self.products_complete:
+                        shared = self.backend.get_product(entity_id)
+                        if shared:
+                            self._insert_product(shared)
+                        else:
+                            self.products_complete = False
+                elif kind == ORDER_EVENT:
+                    self._missing_orders.pop(entity_id, None)
+                    self._drop_order(entity_id)
+                elif kind == PRODUCTS_CREATED_EVENT:
+                    first_id, last_id = unpack_id_range(entity_id)
+                    _forget_missing(self._missing_products, first_id, last_id)
+                    if self.products_complete:
+                        self._insert_shared_products(first_id, last_id)
+                elif kind == ORDERS_CREATED_EVENT:
+                    _forget_missing(self._missing_orders, *unpack_id_range(entity_id))
+                    self.orders_complete = False
+            self._enforce_limits()
+
+    def publish_product(self, product_id: int):
+        self.backend.publish(PRODUCT_EVENT, product_id)
+
+    def publish_order(self, order_id: int):
+        self.backend.publish(ORDER_EVENT, order_id)
+
+    def publish_created_products(self, product_ids: List[int]):
+        """
+        Announces a bulk chunk of new products with one event instead of one per
+        row, which would overrun the shared event ring and reset every other
+        store. No store can have cached new ids, only remembered them as missing.
+        """
+        if product_ids:
+            self.backend.publish(PRODUCTS_CREATED_EVENT, pack_id_range(min(product_ids), max(product_ids)))
+
+    def publish_created_orders(self, order_ids: List[int]):
+        if order_ids:
+            self.backend.publish(ORDERS_CREATED_EVENT, pack_id_range(min(order_ids), max(order_ids)))
+
+    def stats(self) -> dict:
+        with self._lock.read(), self._touch_lock:
+            return {
+                "products": {
+                    **self.product_stats.as_dict(),
+                    "entries": len(self._product_entries),
+                    "negative_entries": len(self._missing_products),
+                    "bytes": self._product_bytes,
+                    "max_entries": self.max_products,
+                    "complete": self.products_complete,
+                },
+                "orders": {
+                    **self.order_stats.as_dict(),
+                    "entries": len(self._orders_index),
+                    "negative_entries": len(self._missing_orders),
+                    "bytes": self._order_bytes,
+                    "max_entries": self.max_orders,
+                    "complete": self.orders_complete,
+                },
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+            }
 
     def insert_product(self, product: ProductResponse):
-        if not self.products_root:
-            self.products_root = BSTNode(product)
+        with self._lock.write():
+            self._insert_product(product)
+            self._enforce_limits()
+        self.backend.put_product(product)
+
+    def insert_products(self, products: List[ProductResponse]):
+        with self._lock.write():
+            self._insert_many(products)
+            self._enforce_limits()
+        for product in products:
+            self.backend.put_product(product)
+
+    def load_products(self, products: List[ProductResponse], complete: bool = False):
+        """
+        Bulk-loads id-sorted products, building a perfectly balanced tree in O(n)
+        instead of n rebalancing inserts. Falls back to regular inserts when the
+        tree already holds products.
+        """
+        with self._lock.write():
+            if self.max_products and len(products) > self.max_products:
+                products = products[-self.max_products:]
+                complete = False
+
+            if self.products_root is None:
+                nodes = [self._new_product_node(p) for p in products]
+                self.products_root = self._build_balanced(nodes, 0, len(nodes))
+                self._name_nodes = sorted(nodes, key=_name_key)
+                self._name_keys = [_name_key(n) for n in self._name_nodes]
+                self._price_nodes = sorted(nodes, key=_price_key)
+                self._price_keys = [_price_key(n) for n in self._price_nodes]
+                for node in nodes:
+                    self._product_entries[node.id] = node
+                    self._product_bytes += node.size
+            else:
+                self._insert_many(products)
+
+            evictions = self.product_stats.evictions
+            self._enforce_limits()
+            self.products_complete = complete and self.product_stats.evictions == evictions
+        for product in products:
+            self.backend.put_product(product)
+
+    def _build_balanced(self, nodes: List[BSTNode], start: int, end: int) -> BSTNode | None:
+        if start >= end:
+            return None
+        middle = (start + end) // 2
+        node = nodes[middle]
+        node.left = self._build_balanced(nodes, start, middle)
+        node.right = self._build_balanced(nodes, middle + 1, end)
+        self._update_height(node)
+        return node
+
+    def find_product(self, product_id: int, as_json: bool = False) -> ProductResponse | bytes | None:
+        """
+        Looks a product up in the tree, then in the shared backend. With as_json
+        the encoded response is returned instead of a model.
+        """
+        self.sync()
+        with self._lock.read():
+            entry = self._product_entries.get(product_id)
+            if entry is not None and not self._is_expired(entry):
+                node = self._search_tree(product_id)
+                if node is not None:
+                    with self._touch_lock:
+                        self._product_entries.move_to_end(product_id)
+                        self.product_stats.hits += 1
+                    return self._json(node) if as_json else node.product
+
+        if entry is not None and self._is_expired(entry):
+            with self._lock.write():
+                if self._product_entries.get(product_id) is entry:
+                    self._remove_product(product_id)
+                    self.products_complete = False
+                    self.product_stats.expirations += 1
+
+        shared = self.backend.get_product(product_id)
+        if shared:
+            with self._lock.write():
+                self._insert_product(shared)
+                self._enforce_limits()
+                self.product_stats.hits += 1
+            return dumps(shared) if as_json else shared
+
+        with self._touch_lock:
+            self.product_stats.misses += 1
+        return None
+
+    def tagged_product(
+            self,
+            product_id: int,
+            encode: bool = True,
+            count: bool = True
+    ) -> Tuple[str, bytes | None] | None:
+        """
+        ETag and encoded response of a cached product, read together so the tag
+        always describes the body; encode=False skips the encoding. None when
+        the product is not cached, without looking at the shared backend.
+        count=False keeps the lookup out of the hit statistics, for peeks and
+        re-reads of an entry whose request was already counted.
+        """
+        self.sync()
+        with self._lock.read():
+            node = self._product_entries.get(product_id)
+            if node is None or self._is_expired(node):
+                return None
+            with self._touch_lock:
+                self._product_entries.move_to_end(product_id)
+                if count:
+                    self.product_stats.hits += 1
+            return self._etag(node), self._json(node) if encode else None
+
+    def remove_product(self, product_id: int) -> bool:
+        with self._lock.write():
+            return self._remove_product(product_id)
+
+    def search_products(
+            self,
+            name_prefix: str | None = None,
+            min_price: float | None = None,
+            max_price: float | None = None,
+            sort: str = "id",
+            offset: int = 0,
+            limit: int | None = None,
+            as_json: bool = False
+    ) -> List[ProductResponse] | bytes:
+        """
+        Filters cached products through the secondary indexes: a sorted name array
+        for prefixes and a sorted price array for ranges, both searched with bisect.
+        Only the requested page is materialized, as models or, with as_json, as an
+        encoded JSON array. Only meaningful while products_complete is set.
+        """
+        self.sync()
+        with self._lock.read():
+            nodes = self._search_nodes(name_prefix, min_price, max_price, sort)
+            page = nodes[offset:None if limit is None else offset + limit]
+            if as_json:
+                return json_array(self._json(n) for n in page)
+            return [n.product for n in page]
+
+    def iter_products(
+            self,
+            name_prefix: str | None = None,
+            min_price: float | None = None,
+            max_price: float | None = None,
+            sort: str = "id",
+            offset: int = 0,
+            limit: int | None = None,
+            chunk_size: int = 500
+    ) -> Iterator[ProductResponse]:
+        """
+        Streams the matches of search_products. Only node references are taken
+        up front; each chunk is materialized under its own read lock, so writers
+        are not blocked for the length of the stream.
+        """
+        self.sync()
+        with self._lock.read():
+            nodes = self._search_nodes(name_prefix, min_price, max_price, sort)
+        nodes = nodes[offset:None if limit is None else offset + limit]
+        for start in range(0, len(nodes), chunk_size):
+            with self._lock.read():
+                chunk = [n.product for n in nodes[start:start + chunk_size]]
+            yield from chunk
+
+    def _search_nodes(
+            self,
+            name_prefix: str | None,
+            min_price: float | None,
+            max_price: float | None,
+            sort: str
+    ) -> List[BSTNode]:
+        if name_prefix:
+            key = name_prefix.title()
+            start = bisect_left(self._name_keys, (key,))
+            end = bisect_left(self._name_keys, (key + "\U0010ffff",))
+            nodes = self._name_nodes[start:end]
+            if min_price is not None:
+                nodes = [n for n in nodes if n.price >= min_price]
+            if max_price is not None:
+                nodes = [n for n in nodes if n.price <= max_price]
+        else:
+            start = bisect_left(self._price_keys, (min_price,)) if min_price is not None else 0
+            end = len(self._price_keys) if max_price is None else bisect_left(self._price_keys, (max_price, math.inf))
+            nodes = self._price_nodes[start:end]
+
+        nodes.sort(key=attrgetter(sort.lstrip("-"), "id"), reverse=sort.startswith("-"))
+        return nodes
+
+    def _insert_shared_products(self, first_id: int, last_id: int):
+        # Ids a bulk chunk skipped, or records the shared table could not hold,
+        # leave the cached catalog incomplete.
+        for product_id in range(first_id, last_id + 1):
+            shared = self.backend.get_product(product_id)
+            if shared is None:
+                self.products_complete = False
+                return
+            self._insert_product(shared)
+
+    def _new_product_node(self, product: ProductResponse) -> BSTNode:
+        node = BSTNode(product)
+        self._stamp(node)
+        return node
+
+    def _insert_product(self, product: ProductResponse):
+        self._missing_products.pop(product.id, None)
+        node = self._product_entries.pop(product.id, None)
+        if node is None:
+            node = self._new_product_node(product)
+            self._insert_tree(node)
         else:
-            self._insert_bst_recursive(self.products_root, product)
+            self._unindex_product(node)
+            self._product_bytes -= node.size
+            node.set_product(product)
+            self._stamp(node)
+
+        key = _name_key(node)
+        position = bisect_left(self._name_keys, key)
+        self._name_keys.insert(position, key)
+        self._name_nodes.insert(position, node)
+        key = _price_key(node)
+        position = bisect_left(self._price_keys, key)
+        self._price_keys.insert(position, key)
+        self._price_nodes.insert(position, node)
+        self._product_entries[node.id] = node
+        self._product_bytes += node.size
 
-    def _insert_bst_recursive(self, node: BSTNode, product: ProductResponse):
-        if product.id < node.product.id:
-            if node.left is None:
-                node.left = BSTNode(product)
+    def _insert_many(self, products: List[ProductResponse]):
+        fresh: dict[int, ProductResponse] = {}
+        for product in products:
+            if product.id in self._product_entries:
+                self._insert_product(product)
             else:
-                self._insert_bst_recursive(node.left, product)
+                fresh[product.id] = product
+
+        # Each single insert shifts the sorted index arrays; for a large batch it is
+        # cheaper to rebuild the tree and merge the indexes in one pass.
+        if len(fresh) < max(BULK_MERGE_MIN, len(self._product_entries) // 32):
+            for product in fresh.values():
+                self._insert_product(product)
+            return
+
+        nodes = [self._new_product_node(p) for p in fresh.values()]
+        for node in nodes:
+            self._missing_products.pop(node.id, None)
+            self._product_entries[node.id] = node
+            self._product_bytes += node.size
+
+        by_id = sorted(self._product_entries.values(), key=attrgetter("id"))
+        self.products_root = self._build_balanced(by_id, 0, len(by_id))
+
+        # Both operands are already sorted, so Timsort merges them in linear time.
+        nodes.sort(key=_name_key)
+        self._name_nodes = sorted(self._name_nodes + nodes, key=_name_key)
+        self._name_keys = [_name_key(n) for n in self._name_nodes]
+        nodes.sort(key=_price_key)
+        self._price_nodes = sorted(self._price_nodes + nodes, key=_price_key)
+        self._price_keys = [_price_key(n) for n in self._price_nodes]
+
+    def _remove_product(self, product_id: int) -> bool:
+        node = self._product_entries.pop(product_id, None)
+        if node is None:
+            return False
+
+        self._product_bytes -= node.size
+        self._unindex_product(node)
+        self._remove_tree(product_id)
+        return True
+
+    def _unindex_product(self, node: BSTNode):
+        position = bisect_left(self._name_keys, _name_key(node))
+        del self._name_keys[position]
+        del self._name_nodes[position]
+
+        position = bisect_left(self._price_keys, _price_key(node))
+        del self._price_keys[position]
+        del self._price_nodes[position]
+
+    def _search_tree(self, product_id: int) -> BSTNode | None:
+        node = self.products_root
+        while node:
+            if product_id == node.id:
+                return node
+            node = node.left if product_id < node.id else node.right
+        return None
+
+    def _insert_tree(self, new_node: BSTNode):
+        if not self.products_root:
+            self.products_root = new_node
+            return
+
+        path: List[BSTNode] = []
+        node = self.products_root
+        while node:
+            path.append(node)
+            node = node.left if new_node.id < node.id else node.right
+
+        parent = path[-1]
+        if new_node.id < parent.id:
+            parent.left = new_node
         else:
-            if node.right is None:
-                node.right = BSTNode(product)
+            parent.right = new_node
+        self._rebalance_path(path)
+
+    def _remove_tree(self, product_id: int) -> BSTNode | None:
+        path: List[BSTNode] = []
+        node = self.products_root
+        while node and node.id != product_id:
+            path.append(node)
+            node = node.left if product_id < node.id else node.right
+
+        if node is None:
+            return None
+
+        if node.left and node.right:
+            # Relink the in-order successor into the removed node's position
+            # instead of copying its fields, so index entries keep pointing to
+            # live nodes.
+            position = len(path)
+            path.append(node)
+            successor = node.right
+            while successor.left:
+                path.append(successor)
+                successor = successor.left
+
+            if path[-1] is node:
+                node.right = successor.right
             else:
-                self._insert_bst_recursive(node.right, product)
+                path[-1].left = successor.right
+
+            successor.left, successor.right, successor.height = node.left, node.right, node.height
+            self._replace_child(path[position - 1] if position else None, node, successor)
+            path[position] = successor
+        else:
+            self._replace_child(path[-1] if path else None, node, node.left or node.right)
+
+        node.left = node.right = None
+        self._rebalance_path(path)
+        return node
+
+    def _replace_child(self, parent: BSTNode | None, child: BSTNode, replacement: BSTNode | None):
+        if parent is None:
+            self.products_root = replacement
+        elif parent.left is child:
+            parent.left = replacement
+        else:
+            parent.right = replacement
+
+    def _rebalance_path(self, path: List[BSTNode]):
+        for i in range(len(path) - 1, -1, -1):
+            node = path[i]
+            self._replace_child(path[i - 1] if i else None, node, self._rebalance(node))
+
+    @staticmethod
+    def _height(node: BSTNode | None) -> int:
+        return node.height if node else 0
+
+    def _update_height(self, node: BSTNode):
+        node.height = 1 + max(self._height(node.left), self._height(node.right))
+
+    def _rotate_left(self, node: BSTNode) -> BSTNode:
+        pivot = node.right
+        node.right = pivot.left
+        pivot.left = node
+        self._update_height(node)
+        self._update_height(pivot)
+        return pivot
+
+    def _rotate_right(self, node: BSTNode) -> BSTNode:
+        pivot = node.left
+        node.left = pivot.right
+        pivot.right = node
+        self._update_height(node)
+        self._update_height(pivot)
+        return pivot
 
-    def find_product(self, product_id: int) -> ProductResponse | None:
-        return self._search_bst(self.products_root, product_id)
+    def _rebalance(self, node: BSTNode) -> BSTNode:
+        self._update_height(node)
+        balance = self._height(node.left) - self._height(node.right)
 
-    def _search_bst(self, node: BSTNode, product_id: int):
-        if node is None or node.product.id == product_id:
-            return node.product if node else None
-        if product_id < node.product.id:
-            return self._search_bst(node.left, product_id)
-        return self._search_bst(node.right, product_id)
+        if balance > 1:
+            if self._height(node.left.left) < self._height(node.left.right):
+                node.left = self._rotate_left(node.left)
+            return self._rotate_right(node)
+
+        if balance < -1:
+            if self._height(node.right.right) < self._height(node.right.left):
+                node.right = self._rotate_right(node.right)
+            return self._rotate_left(node)
+
+        return node
 
     def add_order(self, order: OrderResponse):
-        if self.update_order_node(order):
+        with self._lock.write():
+            self._add_order(order)
+            self._enforce_limits()
+
+    def add_orders(self, orders: Iterable[OrderResponse], complete: bool = False):
+        """
+        Adds a batch of orders under one write lock. With complete=True the batch
+        is the full, id-sorted order table: the list is rebuilt from it in O(n)
+        and flagged complete unless the capacity limits evicted part of it.
+        """
+        with self._lock.write():
+            if complete:
+                self._reset_orders()
+            evictions = self.order_stats.evictions
+            for order in orders:
+                # A full load recomputes the aggregates in one pass at the end.
+                self._add_order(order, aggregate=not complete)
+                self._enforce_limits()
+            if complete:
+                self.orders_complete = self.order_stats.evictions == evictions
+                self._order_aggregates.rebuild(self._iter_order_nodes())
+
+    def get_order(self, order_id: int, as_json: bool = False) -> OrderResponse | bytes | None:
+        self.sync()
+        with self._lock.read():
+            node = self._orders_index.get(order_id)
+            if node is not None and not self._is_expired(node):
+                with self._touch_lock:
+                    self._orders_index.move_to_end(order_id)
+                    self.order_stats.hits += 1
+                return self._json(node) if as_json else node.order
+
+        if node is not None:
+            with self._lock.write():
+                if self._orders_index.get(order_id) is node:
+                    self._drop_order(order_id)
+                    self.order_stats.expirations += 1
+
+        with self._touch_lock:
+            self.order_stats.misses += 1
+        return None
+
+    def tagged_order(
+            self,
+            order_id: int,
+            encode: bool = True,
+            count: bool = True
+    ) -> Tuple[str, bytes | None] | None:
+        """Same as tagged_product for a cached order."""
+        self.sync()
+        with self._lock.read():
+            node = self._orders_index.get(order_id)
+            if node is None or self._is_expired(node):
+                return None
+            with self._touch_lock:
+                self._orders_index.move_to_end(order_id)
+                if count:
+                    self.order_stats.hits += 1
+            return self._etag(node), self._json(node) if encode else None
+
+    def order_count(self) -> int:
+        with self._lock.read():
+            return len(self._orders_index)
+
+    def get_all_orders(self, as_json: bool = False) -> List[OrderResponse] | bytes:
+        return self.get_orders_page(as_json=as_json)
+
+    def get_orders_page(
+            self,
+            after: int | None = None,
+            limit: int | None = None,
+            as_json: bool = False,
+            status: str | None = None
+    ) -> List[OrderResponse] | bytes:
+        """
+        Orders with an id greater than `after`, in id order. With a status the
+        page comes from that status' posting list in O(log n + k) for k orders
+        returned; otherwise the list is walked from the cursor.
+        """
+        self.sync()
+        with self._lock.read():
+            if status is not None:
+                nodes = self._posted_nodes(self._orders_by_status.get(status, []), after, limit)
+                if as_json:
+                    return json_array(self._json(n) for n in nodes)
+                return [n.order for n in nodes]
+
+            if after is None:
+                current = self.orders_head
+            elif after in self._orders_index:
+                current = self._orders_index[after].next
+            else:
+                position = bisect_right(self._order_ids, after)
+                current = self._orders_index[self._order_ids[position]] if position < len(self._order_ids) else None
+
+            nodes = []
+            while current and (limit is None or len(nodes) < limit):
+                nodes.append(current)
+                current = current.next
+            if as_json:
+                return json_array(self._json(n) for n in nodes)
+            return [n.order for n in nodes]
+
+    def get_orders_by_product(
+            self,
+            product_id: int,
+            after: int | None = None,
+            limit: int | None = None,
+            as_json: bool = False
+    ) -> List[OrderResponse] | bytes:
+        """
+        Cached orders containing a product, in id order, found through the
+        product's posting list instead of walking the order list. Only
+        meaningful while orders_complete is set.
+        """
+        self.sync()
+        with self._lock.read():
+            nodes = self._posted_nodes(self._orders_by_product.get(product_id, []), after, limit)
+            if as_json:
+                return json_array(self._json(n) for n in nodes)
+            return [n.order for n in nodes]
+
+    def iter_orders(
+            self,
+            after: int | None = None,
+            limit: int | None = None,
+            chunk_size: int = 500,
+            status: str | None = None
+    ) -> Iterator[OrderResponse]:
+        """
+        Streams the list page by page, resuming each page from the last id sent
+        so only one page is held at a time and the read lock is released between
+        pages. Orders added or removed meanwhile may or may not be included.
+        """
+        remaining = limit
+        while remaining is None or remaining > 0:
+            page_size = chunk_size if remaining is None else min(chunk_size, remaining)
+            page = self.get_orders_page(after, page_size, status=status)
+            yield from page
+            if len(page) < page_size:
+                return
+            after = page[-1].id
+            if remaining is not None:
+                remaining -= len(page)
+
+    def top_products_by_units(self, limit: int) -> List[Tuple[int, int]]:
+        """(product_id, units ordered) for the best-selling products. Exact while orders_complete."""
+        self.sync()
+        with self._lock.read():
+            return self._order_aggregates.top_products(limit)
+
+    def order_status_totals(self) -> Dict[str, Tuple[int, Dict[int, int]]]:
+        """Maps each status to its order count and units per product. Exact while orders_complete."""
+        self.sync()
+        with self._lock.read():
+            aggregates = self._order_aggregates
+            return {
+                status: (count, dict(aggregates.units_by_status.get(status, {})))
+                for status, count in aggregates.orders_by_status.items()
+            }
+
+    def remove_order(self, order_id: int) -> bool:
+        with self._lock.write():
+            return self._remove_order(order_id)
+
+    def update_order_node(self, updated_order: OrderResponse) -> bool:
+        with self._lock.write():
+            return self._update_order_node(updated_order)
+
+    def _add_order(self, order: OrderResponse, aggregate: bool = True):
+        self._missing_orders.pop(order.id, None)
+        if self._update_order_node(order):
+            self._orders_index.move_to_end(order.id)
             return
 
         new_node = ListNode(order)
-        if not self.orders_head:
+        self._stamp(new_node)
+        self._order_bytes += new_node.size
+        if aggregate:
+            self._order_aggregates.add(new_node)
+        self._post_order(new_node)
+
+        # Ids normally arrive in ascending order, making this a tail append.
+        order_ids = self._order_ids
+        if not order_ids or order_ids[-1] < order.id:
+            prev = self.orders_tail
+            order_ids.append(order.id)
+        else:
+            position = bisect_left(order_ids, order.id)
+            prev = self._orders_index[order_ids[position - 1]] if position else None
+            order_ids.insert(position, order.id)
+
+        new_node.prev = prev
+        new_node.next = prev.next if prev else self.orders_head
+        if new_node.next:
+            new_node.next.prev = new_node
+        else:
+            self.orders_tail = new_node
+        if prev:
+            prev.next = new_node
+        else:
             self.orders_head = new_node
+        self._orders_index[order.id] = new_node
+
+    def _remove_order(self, order_id: int) -> bool:
+        node = self._orders_index.pop(order_id, None)
+        if node is None:
+            return False
+
+        self._order_bytes -= node.size
+        self._order_aggregates.remove(node)
+        self._unpost_order(node)
+        del self._order_ids[bisect_left(self._order_ids, order_id)]
+        if node.prev:
+            node.prev.next = node.next
         else:
-            current = self.orders_head
-            while current.next:
-                current = current.next
-            current.next = new_node
+            self.orders_head = node.next
+        if node.next:
+            node.next.prev = node.prev
+        else:
+            self.orders_tail = node.prev
+        node.prev = node.next = None
+        return True
 
-    def get_order(self, order_id: int) -> OrderResponse | None:
-        current = self.orders_head
-        while current:
-            if current.order.id == order_id:
-                return current.order
-            current = current.next
-        return None
+    def _update_order_node(self, updated_order: OrderResponse) -> bool:
+        node = self._orders_index.get(updated_order.id)
+        if node is None:
+            return False
 
-    def get_all_orders(self) -> List[OrderResponse]:
-        orders = []
-        current = self.orders_head
-        while current:
-            orders.append(current.order)
-            current = current.next
-        return orders
+        self._order_bytes -= node.size
+        self._order_aggregates.remove(node)
+        self._unpost_order(node)
+        node.set_order(updated_order)
+        self._stamp(node)
+        self._order_bytes += node.size
+        self._order_aggregates.add(node)
+        self._post_order(node)
+        return True
 
-    def remove_order(self, order_id: int) -> bool:
-        current = self.orders_head
-        prev = None
-        while current:
-            if current.order.id == order_id:
-                if prev:
-                    prev.next = current.next
-                else:
-                    self.orders_head = current.next
-                return True
-            prev = current
-            current = current.next
-        return False
+    def _posted_nodes(self, order_ids: List[int], after: int | None, limit: int | None) -> List[ListNode]:
+        start = bisect_right(order_ids, after) if after is not None else 0
+        end = None if limit is None else start + limit
+        return [self._orders_index[order_id] for order_id in order_ids[start:end]]
 
-    def update_order_node(self, updated_order: OrderResponse) -> bool:
+    def _post_order(self, node: ListNode):
+        _post(self._orders_by_status, node.status, node.id)
+        # Legacy rows may hold several lines for one product; post the order once.
+        for product_id in sorted(set(node.items[::2])):
+            _post(self._orders_by_product, product_id, node.id)
+
+    def _unpost_order(self, node: ListNode):
+        _unpost(self._orders_by_status, node.status, node.id)
+        for product_id in sorted(set(node.items[::2])):
+            _unpost(self._orders_by_product, product_id, node.id)
+
+    def _iter_order_nodes(self) -> Iterator[ListNode]:
         current = self.orders_head
         while current:
-            if current.order.id == updated_order.id:
-                current.order = updated_order
-                return True
+            yield current
             current = current.next
-        return False
+
+    def _drop_order(self, order_id: int):
+        self._remove_order(order_id)
+        self.orders_complete = False
+
+    # Negative lookups
+
+    def is_missing_product(self, product_id: int) -> bool:
+        """
+        True when the product is known not to exist: SQL recently came back empty
+        for it, or the whole catalog is cached without it and the backend
+        announces the products other workers create.
+        """
+        self.sync()
+        with self._lock.read(), self._touch_lock:
+            if self.products_complete and self.backend.shares_events:
+                missing = product_id not in self._product_entries
+            else:
+                missing = self._is_known_missing(self._missing_products, product_id)
+            if missing:
+                self.product_stats.negative_hits += 1
+            return missing
+
+    def is_missing_order(self, order_id: int) -> bool:
+        self.sync()
+        with self._lock.read(), self._touch_lock:
+            if self.orders_complete and self.backend.shares_events:
+                missing = order_id not in self._orders_index
+            else:
+                missing = self._is_known_missing(self._missing_orders, order_id)
+            if missing:
+                self.order_stats.negative_hits += 1
+            return missing
+
+    def remember_missing_products(self, product_ids: Iterable[int]):
+        with self._lock.read(), self._touch_lock:
+            for product_id in product_ids:
+                if product_id not in self._product_entries:
+                    self._remember_missing(self._missing_products, product_id)
+
+    def remember_missing_orders(self, order_ids: Iterable[int]):
+        with self._lock.read(), self._touch_lock:
+            for order_id in order_ids:
+                if order_id not in self._orders_index:
+                    self._remember_missing(self._missing_orders, order_id)
+
+    # Callers hold the read lock and the touch lock, or the write lock.
+
+    @staticmethod
+    def _is_known_missing(missing: OrderedDict[int, float], entity_id: int) -> bool:
+        expires_at = missing.get(entity_id)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del missing[entity_id]
+            return False
+        return True
+
+    def _remember_missing(self, missing: OrderedDict[int, float], entity_id: int):
+        if not self.negative_max_entries or not self.negative_ttl_seconds:
+            return
+        missing[entity_id] = time.monotonic() + self.negative_ttl_seconds
+        missing.move_to_end(entity_id)
+        while len(missing) > self.negative_max_entries:
+            missing.popitem(last=False)
+
+    # Capacity and expiry (callers hold the write lock)
+
+    def _stamp(self, node: BSTNode | ListNode):
+        # A cached encoding is a second copy of the entry, so it counts twice.
+        if self.max_bytes:
+            node.size = len(self._json(node)) * (2 if self.cache_json else 1)
+        else:
+            node.size = 0
+        node.expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+
+    def _etag(self, node: BSTNode | ListNode) -> str:
+        tag = node.etag
+        if tag is None:
+            tag = node.etag = etag(self._json(node))
+        return tag
+
+    def _json(self, node: BSTNode | ListNode) -> bytes:
+        """
+        Encodes a node, keeping the bytes on it when cache_json is set and its
+        ETag always. Readers may fill the slots concurrently; they all store the
+        same values, and writers reset them under the write lock whenever the
+        entry changes.
+        """
+        data = node.json
+        if data is None:
+            data = node.to_json()
+            if node.etag is None:
+                node.etag = etag(data)
+            if self.cache_json:
+                node.json = data
+        return data
+
+    @staticmethod
+    def _is_expired(node: BSTNode | ListNode) -> bool:
+        return node.expires_at is not None and node.expires_at <= time.monotonic()
+
+    def _enforce_limits(self):
+        while self.max_products and len(self._product_entries) > self.max_products:
+            self._evict_product()
+
+        while self.max_orders and len(self._orders_index) > self.max_orders:
+            self._evict_order()
+
+        while self.max_bytes and self._product_bytes + self._order_bytes > self.max_bytes:
+            if self._product_bytes >= self._order_bytes and self._product_entries:
+                self._evict_product()
+            elif self._orders_index:
+                self._evict_order()
+            else:
+                break
+
+    def _evict_product(self):
+        product_id = next(iter(self._product_entries))
+        self._remove_product(product_id)
+        self.products_complete = False
+        self.product_stats.evictions += 1
+
+    def _evict_order(self):
+        order_id = next(iter(self._orders_index))
+        self._drop_order(order_id)
+        self.order_stats.evictions += 1
+
+
+def _post(postings: dict, key, order_id: int):
+    order_ids = postings.setdefault(key, [])
+    # Ids normally arrive in ascending order, making this an append.
+    if not order_ids or order_ids[-1] < order_id:
+        order_ids.append(order_id)
+    else:
+        insort(order_ids, order_id)
+
+
+def _unpost(postings: dict, key, order_id: int):
+    order_ids = postings.get(key)
+    if not order_ids:
+        return
+    position = bisect_left(order_ids, order_id)
+    if position < len(order_ids) and order_ids[position] == order_id:
+        del order_ids[position]
+    if not order_ids:
+        del postings[key]
+
+
+def _forget_missing(missing: OrderedDict[int, float], first_id: int, last_id: int):
+    for entity_id in [i for i in missing if first_id <= i <= last_id]:
+        del missing[entity_id]
 
 
-store = DataStore()
+store = DataStore(
+    max_products=settings.cache_max_products,
+    max_orders=settings.cache_max_orders,
+    max_bytes=settings.cache_max_bytes,
+    ttl_seconds=settings.cache_ttl_seconds,
+    negative_max_entries=settings.cache_negative_max_entries,
+    negative_ttl_seconds=settings.cache_negative_ttl_seconds,
+    cache_json=settings.cache_json_bytes,
+    backend=create_backend(
+        settings.cache_backend,
+        path=settings.cache_shared_path,
+        slots=settings.cache_shared_slots,
+        ring_size=settings.cache_shared_events,
+        database_url=settings.db_connection_string
+    )
+)
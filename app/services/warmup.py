@@ -0,0 +1,81 @@
+import logging
+import time
+from typing import Callable, List, TypeVar
+
+from sqlalchemy import Select, select
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.sql_models import ProductSQL, OrderSQL
+from app.services.order_service import OrderService
+from app.services.product_service import ProductService
+from app.services.store_manager import store
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class CacheWarmup:
+    """
+    Preloads the in-memory store at startup, streaming rows from SQL in chunks.
+
+    Modes:
+        off       -> nothing is preloaded (pure lazy loading).
+        products  -> the whole product catalog.
+        recent    -> the `recent` newest products and orders (highest ids).
+        full      -> every product and every order with its items.
+    """
+
+    @staticmethod
+    def run(db: Session, mode: str, recent: int = 1000, chunk_size: int = 1000) -> dict:
+        if mode == "off":
+            return {"mode": mode}
+
+        started = time.perf_counter()
+        report = {"mode": mode}
+
+        product_query = select(ProductSQL)
+        if mode == "recent":
+            product_query = product_query.order_by(ProductSQL.id.desc()).limit(recent)
+        else:
+            product_query = product_query.order_by(ProductSQL.id)
+
+        products = CacheWarmup._stream(db, product_query, chunk_size, ProductService._to_response, "products")
+        if mode == "recent":
+            products.reverse()
+        store.load_products(products, complete=mode != "recent")
+        report["products"] = len(products)
+
+        if mode in ("recent", "full"):
+            order_query = select(OrderSQL).options(selectinload(OrderSQL.items))
+            if mode == "recent":
+                order_query = order_query.order_by(OrderSQL.id.desc()).limit(recent)
+            else:
+                order_query = order_query.order_by(OrderSQL.id)
+
+            orders = CacheWarmup._stream(db, order_query, chunk_size, OrderService._map_to_response, "orders")
+            if mode == "recent":
+                orders.reverse()
+            store.add_orders(orders, complete=mode == "full")
+            report["orders"] = len(orders)
+
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(f"Cache warm-up finished: {report}")
+        return report
+
+    @staticmethod
+    def _stream(
+            db: Session,
+            query: Select,
+            chunk_size: int,
+            mapper: Callable[[object], T],
+            label: str
+    ) -> List[T]:
+        loaded: List[T] = []
+        result = db.execute(query.execution_options(yield_per=chunk_size)).scalars()
+
+        for chunk in result.partitions():
+            loaded.extend(mapper(row) for row in chunk)
+            logger.info(f"Cache warm-up: {len(loaded)} {label} loaded")
+
+        return loaded
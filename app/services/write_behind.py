@@ -0,0 +1,217 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from app.metrics import registry
+from app.models.sql_models import OrderSQL
+from app.settings import get_settings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+registry.describe("app_write_behind_flushed_total", "Order status changes written to SQL by the write-behind worker.")
+registry.describe("app_write_behind_flush_errors_total", "Write-behind flushes that failed and will be retried.")
+registry.describe("app_write_behind_flush_seconds", "Duration of successful write-behind flushes.")
+
+_flushed = registry.counter("app_write_behind_flushed_total")
+_flush_errors = registry.counter("app_write_behind_flush_errors_total")
+_flush_seconds = registry.histogram("app_write_behind_flush_seconds")
+
+_orders = OrderSQL.__table__
+_STATUS_UPDATE = update(_orders).where(_orders.c.id == bindparam("b_id")).values(status=bindparam("b_status"))
+
+
+class OrderStatusWriteBehind:
+    """
+    Opt-in write-behind for order status changes.
+
+    A change is appended to a local journal (fsynced when `fsync` is set) and
+    kept in a dict keyed by order id, so repeated changes to one order coalesce
+    and only the last is written. A daemon thread writes the pending statuses
+    with one executemany UPDATE every `flush_interval` seconds, or as soon as
+    `batch_size` orders are pending, and then compacts the journal to what is
+    still pending. A failed flush keeps its changes pending and is retried.
+
+    On start the journal is replayed, so changes acknowledged before a crash
+    reach SQL on the next flush. Until they do, pending_status() lets rows read
+    from SQL show the newer status.
+
+    The journal is locked for the lifetime of the process: write-behind
+    requires a single worker.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            flush_interval: float = 1.0,
+            batch_size: int = 1000,
+            fsync: bool = True,
+            enabled: bool = False
+    ):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.enabled = enabled
+        self._pending: Dict[int, str] = {}
+        self._flushing: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._journal = None
+        self._lock_file = None
+        self._session_factory: Optional[Callable[[], Session]] = None
+
+    def start(self, session_factory: Callable[[], Session]):
+        if not self.enabled or self._thread is not None:
+            return
+
+        self._session_factory = session_factory
+        self._lock_file = open(self.path + ".lock", "a+b")
+        try:
+            _lock_exclusive(self._lock_file)
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            raise RuntimeError(f"{self.path} is used by another process; write-behind requires a single worker")
+
+        self._pending = self._replay()
+        if self._pending:
+            logger.info("Replaying %d order status changes from %s", len(self._pending), self.path)
+        self._compact()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="order-status-write-behind", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the worker after a final flush. Unflushed changes stay in the journal."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+
+        self._journal.close()
+        self._journal = None
+        self._lock_file.close()
+        self._lock_file = None
+
+    def record(self, order_id: int, status: str):
+        """Journals a status change and returns once it is durable locally."""
+        with self._lock:
+            self._journal.write(f"{order_id}\t{status}\n".encode())
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+            self._pending[order_id] = status
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def pending_status(self, order_id: int) -> Optional[str]:
+        return self._pending.get(order_id) or self._flushing.get(order_id)
+
+    def flush(self) -> int:
+        """Writes every pending change in one transaction. Returns the number of orders written."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                self._flushing, self._pending = self._pending, {}
+
+            batch = self._flushing
+            started = time.perf_counter()
+            try:
+                rows = [{"b_id": order_id, "b_status": status} for order_id, status in batch.items()]
+                with self._session_factory() as db:
+                    for start in range(0, len(rows), self.batch_size):
+                        db.execute(_STATUS_UPDATE, rows[start:start + self.batch_size])
+                    db.commit()
+            except Exception:
+                _flush_errors.inc()
+                logger.exception("Write-behind flush of %d order statuses failed, will retry", len(batch))
+                with self._lock:
+                    for order_id, status in batch.items():
+                        self._pending.setdefault(order_id, status)
+                    self._flushing = {}
+                return 0
+
+            with self._lock:
+                self._flushing = {}
+                self._compact()
+            _flushed.inc(len(batch))
+            _flush_seconds.observe(time.perf_counter() - started)
+            return len(batch)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "running": self._thread is not None,
+            "pending": len(self._pending) + len(self._flushing),
+            "flushed": int(_flushed.value),
+            "failed_flushes": int(_flush_errors.value),
+        }
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def _replay(self) -> Dict[int, str]:
+        pending: Dict[int, str] = {}
+        if not os.path.exists(self.path):
+            return pending
+
+        with open(self.path, "rb") as journal:
+            for line in journal:
+                # A torn last line from a crash mid-append never got acknowledged.
+                order_id, _, status = line.rstrip(b"\n").decode(errors="replace").partition("\t")
+                if line.endswith(b"\n") and order_id.isdigit() and status:
+                    pending[int(order_id)] = status
+        return pending
+
+    def _compact(self):
+        """Atomically replaces the journal with the pending changes (caller holds _lock or has not started)."""
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as temp:
+            temp.write("".join(f"{order_id}\t{status}\n" for order_id, status in self._pending.items()).encode())
+            temp.flush()
+            os.fsync(temp.fileno())
+
+        if self._journal is not None:
+            self._journal.close()
+        os.replace(temp_path, self.path)
+        self._journal = open(self.path, "ab")
+
+
+def _lock_exclusive(file):
+    if fcntl:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:
+        msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+
+
+status_writer = OrderStatusWriteBehind(
+    path=settings.write_behind_journal_path,
+    flush_interval=settings.write_behind_flush_interval,
+    batch_size=settings.write_behind_batch_size,
+    fsync=settings.write_behind_fsync,
+    enabled=settings.write_behind_enabled
+)
@@ -1,14 +1,53 @@
 from functools import lru_cache
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     db_connection_string: str
+    db_async: bool = False
+    db_async_connection_string: str = ""
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = -1
+    db_pool_pre_ping: bool = False
+    db_fast_executemany: bool = True
     api_key_secret: str
     environment: str = "development"
     log_level: str = "INFO"
 
+    cache_max_products: int = 0
+    cache_max_orders: int = 0
+    cache_max_bytes: int = 0
+    cache_ttl_seconds: float = 0
+    cache_negative_max_entries: int = 10000
+    cache_negative_ttl_seconds: float = 30
+    cache_json_bytes: bool = True
+
+    cache_warmup: Literal["off", "products", "recent", "full"] = "off"
+    cache_warmup_recent: int = 1000
+    cache_warmup_chunk_size: int = 1000
+
+    cache_backend: Literal["local", "shared"] = "local"
+    cache_shared_path: str = ""
+    cache_shared_slots: int = 16384
+    cache_shared_events: int = 4096
+
+    metrics_enabled: bool = True
+
+    write_behind_enabled: bool = False
+    write_behind_journal_path: str = "order_status.journal"
+    write_behind_flush_interval: float = 1.0
+    write_behind_batch_size: int = 1000
+    write_behind_fsync: bool = True
+
+    http_cache_control: str = "private, no-cache"
+
+    bulk_chunk_size: int = 5000
+    stream_chunk_size: int = 500
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
@@ -0,0 +1,159 @@
+"""
+Concurrency load test comparing the sync (threadpool) and async database stacks.
+
+Starts the API under uvicorn once per mode, seeds a catalog and fires SQL-bound
+catalog searches at increasing concurrency levels:
+
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --concurrency 20 40 80 160 --requests 2000 --output load.json
+    python -m benchmarks.load_test --database "mssql+pyodbc://..."
+
+Sync endpoints run on Starlette's threadpool (40 threads by default), so their
+throughput flattens once concurrency exceeds it; async endpoints keep scaling
+until the database or the connection pool saturates.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+import httpx
+from sqlalchemy import create_engine
+
+API_KEY = "load-test"
+
+
+def prepare_database(database: str | None) -> str:
+    if database:
+        return database
+    path = os.path.join(tempfile.mkdtemp(), "load_test.db")
+    os.environ.setdefault("DB_CONNECTION_STRING", f"sqlite:///{path}")
+    os.environ.setdefault("API_KEY_SECRET", API_KEY)
+
+    from app.database.database import Base
+    # Imported for its side effect: defining the models registers their tables on Base.metadata.
+    from app.models import sql_models  # noqa: F401
+
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    return f"sqlite:///{path}"
+
+
+def start_server(database: str, use_async: bool, args) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "DB_CONNECTION_STRING": database,
+        "DB_ASYNC": str(use_async).lower(),
+        "DB_POOL_SIZE": str(args.pool_size),
+        "DB_MAX_OVERFLOW": str(args.max_overflow),
+        "API_KEY_SECRET": API_KEY,
+        "LOG_LEVEL": "WARNING",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--workers", str(args.workers),
+         "--log-level", "warning", "--no-access-log"],
+        env=env
+    )
+
+
+def wait_until_ready(base_url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base_url}/diagnostics/cache", headers={"X-API-Key": API_KEY}, timeout=1)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not start")
+
+
+async def run_level(base_url: str, path: str, concurrency: int, requests: int) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, headers={"X-API-Key": API_KEY}, limits=limits, timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                except httpx.TransportError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+                errors += response.status_code != 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies = sorted(latencies) or [float("nan")]
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "requests_per_second": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+def run_mode(database: str, use_async: bool, args) -> List[dict]:
+    base_url = f"http://127.0.0.1:{args.port}"
+    server = start_server(database, use_async, args)
+    try:
+        wait_until_ready(base_url)
+        headers = {"X-API-Key": API_KEY}
+        for i in range(args.products):
+            httpx.post(f"{base_url}/products/", json={"name": f"Load {i}", "price": 1 + i % 100}, headers=headers)
+
+        results = []
+        for concurrency in args.concurrency:
+            result = asyncio.run(run_level(base_url, args.path, concurrency, args.requests))
+            result["mode"] = "async" if use_async else "sync"
+            print(
+                f"{result['mode']:>6} c={concurrency:<5} {result['requests_per_second']:>9} req/s "
+                f"p50={result['p50_ms']}ms p99={result['p99_ms']}ms errors={result['errors']}",
+                file=sys.stderr
+            )
+            results.append(result)
+        return results
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", help="Connection string (defaults to a temporary SQLite file)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 40, 80, 160])
+    parser.add_argument("--requests", type=int, default=1000, help="Requests per concurrency level")
+    parser.add_argument("--products", type=int, default=200, help="Products seeded before measuring")
+    parser.add_argument("--path", default="/products/?name=Load&limit=20", help="SQL-bound endpoint to hit")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--max-overflow", type=int, default=10)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    database = prepare_database(args.database)
+    results = run_mode(database, False, args) + run_mode(database, True, args)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"path": args.path, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Bytes retained per cached product and per cached order, comparing the original
+representation (Pydantic models wrapped in __dict__-based nodes) with the
+compact __slots__ nodes used by DataStore.
+
+    python -m benchmarks.memory_footprint --records 1000000
+"""
+import argparse
+import gc
+import json
+import os
+import tracemalloc
+from typing import Callable, Optional
+
+os.environ.setdefault("DB_CONNECTION_STRING", "sqlite://")
+os.environ.setdefault("API_KEY_SECRET", "benchmark")
+
+from app.models import OrderItemResponse, OrderResponse, ProductResponse  # noqa: E402
+from app.services.store_manager import DataStore  # noqa: E402
+
+
+class LegacyBSTNode:
+    def __init__(self, product: ProductResponse):
+        self.product = product
+        self.left: Optional['LegacyBSTNode'] = None
+        self.right: Optional['LegacyBSTNode'] = None
+
+
+class LegacyListNode:
+    def __init__(self, order: OrderResponse):
+        self.order = order
+        self.next: Optional['LegacyListNode'] = None
+
+
+def make_product(product_id: int) -> ProductResponse:
+    return ProductResponse(
+        id=product_id,
+        name=f"Product {product_id}",
+        price=round(product_id * 0.37, 2),
+        description=f"Description of product {product_id}"
+    )
+
+
+def make_order(order_id: int) -> OrderResponse:
+    return OrderResponse(
+        id=order_id,
+        status="Pending",
+        items=[
+            OrderItemResponse(product_id=order_id % 1000 + 1, quantity=1),
+            OrderItemResponse(product_id=order_id % 1000 + 2, quantity=3),
+        ]
+    )
+
+
+def legacy_products(records: int):
+    root = None
+    for product_id in range(records, 0, -1):
+        node = LegacyBSTNode(make_product(product_id))
+        node.right = root
+        root = node
+    return root
+
+
+def legacy_orders(records: int):
+    head = None
+    for order_id in range(records, 0, -1):
+        node = LegacyListNode(make_order(order_id))
+        node.next = head
+        head = node
+    return head
+
+
+def compact_products(records: int):
+    data_store = DataStore()
+    data_store.load_products([make_product(i) for i in range(1, records + 1)])
+    return data_store
+
+
+def compact_orders(records: int):
+    data_store = DataStore()
+    data_store.add_orders((make_order(i) for i in range(1, records + 1)), complete=True)
+    return data_store
+
+
+def bytes_per_record(build: Callable[[int], object], records: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    retained = build(records)
+    gc.collect()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del retained
+    gc.collect()
+    return round((current - baseline) / records, 1)
+
+
+def run(records: int) -> dict:
+    return {
+        "records": records,
+        "product_bytes": {
+            "before": bytes_per_record(legacy_products, records),
+            "after": bytes_per_record(compact_products, records),
+        },
+        "order_bytes": {
+            "before": bytes_per_record(legacy_orders, records),
+            "after": bytes_per_record(compact_orders, records),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=1_000_000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.records), indent=2))
+
+
+if __name__ == "__main__":
+    main()
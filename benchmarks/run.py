@@ -0,0 +1,254 @@
+"""
+Reproducible benchmark suite for the in-memory structures and the API hot paths.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --sizes 1000 10000 100000 1000000 --output results.json
+    python -m benchmarks.run --compare baseline.json results.json
+
+Every measurement is emitted as a JSON record keyed by (name, size, ids) so two
+result files produced on different commits can be compared.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, List
+
+os.environ.setdefault("DB_CONNECTION_STRING", "sqlite://")
+os.environ.setdefault("API_KEY_SECRET", "benchmark")
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.database.database import Base, get_db  # noqa: E402
+from app.models import OrderItemResponse, OrderResponse, ProductResponse  # noqa: E402
+from app.services import store  # noqa: E402
+from app.services.store_manager import DataStore  # noqa: E402
+from app.settings import get_settings  # noqa: E402
+from benchmarks import memory_footprint  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+
+def timed(name: str, size: int, ids: str, operations: int, action: Callable[[], None]) -> dict:
+    started = time.perf_counter()
+    action()
+    seconds = time.perf_counter() - started
+    return {
+        "name": name,
+        "size": size,
+        "ids": ids,
+        "operations": operations,
+        "seconds": round(seconds, 6),
+        "ns_per_op": round(seconds / operations * 1e9, 1),
+    }
+
+
+def id_sequence(size: int, ids: str) -> List[int]:
+    sequence = list(range(1, size + 1))
+    if ids == "random":
+        random.Random(size).shuffle(sequence)
+    return sequence
+
+
+def bench_product_index(size: int, ids: str) -> List[dict]:
+    sequence = id_sequence(size, ids)
+    products = [ProductResponse(id=i, name=f"Product {i}", price=float(i % 997) + 0.5) for i in sequence]
+    data_store = DataStore()
+    lookups = sequence[:]
+    random.Random(0).shuffle(lookups)
+
+    def insert():
+        for product in products:
+            data_store.insert_product(product)
+
+    def lookup():
+        for product_id in lookups:
+            data_store.find_product(product_id)
+
+    def delete():
+        for product_id in sequence:
+            data_store.remove_product(product_id)
+
+    return [
+        timed("product_index.insert", size, ids, size, insert),
+        timed("product_index.lookup", size, ids, size, lookup),
+        timed("product_index.delete", size, ids, size, delete),
+    ]
+
+
+def bench_order_list(size: int, ids: str) -> List[dict]:
+    sequence = id_sequence(size, ids)
+    orders = [
+        OrderResponse(id=i, status="Pending", items=[OrderItemResponse(product_id=i % 50 + 1, quantity=1)])
+        for i in sequence
+    ]
+    data_store = DataStore()
+    lookups = sequence[:]
+    random.Random(0).shuffle(lookups)
+
+    def append():
+        for order in orders:
+            data_store.add_order(order)
+
+    def lookup():
+        for order_id in lookups:
+            data_store.get_order(order_id)
+
+    def remove():
+        for order_id in lookups:
+            data_store.remove_order(order_id)
+
+    return [
+        timed("order_list.add", size, ids, size, append),
+        timed("order_list.lookup", size, ids, size, lookup),
+        timed("order_list.remove", size, ids, size, remove),
+    ]
+
+
+def bench_api(requests: int) -> List[dict]:
+    from main import app
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    store.clear()
+    results = []
+    try:
+        with TestClient(app) as client:
+            client.headers.update({"X-API-Key": get_settings().api_key_secret})
+            product_ids = [
+                client.post("/products/", json={"name": f"Bench {i}", "price": 10 + i}).json()["id"]
+                for i in range(20)
+            ]
+            payload = {"items": [{"product_id": pid, "quantity": 1} for pid in product_ids[:5]]}
+
+            def create_orders():
+                for _ in range(requests):
+                    assert client.post("/orders/", json=payload).status_code == 201
+
+            def cold_list():
+                store.clear()
+                assert client.get("/orders/").status_code == 200
+
+            def warm_list():
+                for _ in range(20):
+                    assert client.get("/orders/").status_code == 200
+
+            results.append(timed("api.post_orders", requests, "sequential", requests, create_orders))
+            results.append(timed("api.get_orders_cold", requests, "sequential", 1, cold_list))
+            results.append(timed("api.get_orders_warm", requests, "sequential", 20, warm_list))
+    finally:
+        app.dependency_overrides.clear()
+        store.clear()
+        Base.metadata.drop_all(bind=engine)
+    return results
+
+
+def bench_memory(records: int) -> List[dict]:
+    footprint = memory_footprint.run(records)
+    return [
+        {"name": "memory.bytes_per_product", "size": records, "ids": "sequential",
+         "value": footprint["product_bytes"]["after"]},
+        {"name": "memory.bytes_per_order", "size": records, "ids": "sequential",
+         "value": footprint["order_bytes"]["after"]},
+    ]
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes: List[int], requests: int, memory_records: int) -> dict:
+    results = []
+    for size in sizes:
+        for ids in ("sequential", "random"):
+            print(f"structures: size={size} ids={ids}", file=sys.stderr)
+            results.extend(bench_product_index(size, ids))
+            results.extend(bench_order_list(size, ids))
+
+    if requests:
+        print(f"api: requests={requests}", file=sys.stderr)
+        results.extend(bench_api(requests))
+
+    if memory_records:
+        print(f"memory: records={memory_records}", file=sys.stderr)
+        results.extend(bench_memory(memory_records))
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline_path: str, current_path: str, threshold: float) -> int:
+    with open(baseline_path) as f:
+        baseline = {(r["name"], r["size"], r["ids"]): r for r in json.load(f)["results"]}
+    with open(current_path) as f:
+        current = json.load(f)["results"]
+
+    regressions = 0
+    print(f"{'benchmark':<32}{'size':>10}{'ids':>12}{'baseline':>14}{'current':>14}{'ratio':>8}")
+    for record in current:
+        key = (record["name"], record["size"], record["ids"])
+        if key not in baseline:
+            continue
+        metric = "ns_per_op" if "ns_per_op" in record else "value"
+        old, new = baseline[key][metric], record[metric]
+        ratio = new / old if old else float("inf")
+        flag = "  <-- regression" if ratio > 1 + threshold else ""
+        regressions += bool(flag)
+        print(f"{record['name']:<32}{record['size']:>10}{record['ids']:>12}{old:>14.1f}{new:>14.1f}{ratio:>8.2f}{flag}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--requests", type=int, default=200, help="Orders created in the API benchmark (0 skips it)")
+    parser.add_argument("--memory-records", type=int, default=100_000, help="Records for the memory benchmark (0 skips it)")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="Compare two result files")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown reported as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare, threshold=args.threshold))
+
+    report = json.dumps(run(args.sizes, args.requests, args.memory_records), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
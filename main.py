@@ -1,18 +1,44 @@
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, status
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 
+from app.database.database import SessionLocal, async_engine
 from app.errors import EntityNotFoundError, BusinessRuleError, ExternalAPIError, AuthenticationError
-from app.routes import products_router, orders_router
+from app.metrics import MetricsMiddleware
+from app.routes import products_router, orders_router, diagnostics_router, metrics_router, analytics_router
+from app.routes import async_products_router, async_orders_router
+from app.services import CacheWarmup, status_writer
 from app.settings import get_settings
 
 settings = get_settings()
 logging.basicConfig(level=settings.log_level)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Data Structures API", version="2.5")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    status_writer.start(SessionLocal)
+    if settings.cache_warmup != "off":
+        try:
+            with SessionLocal() as db:
+                CacheWarmup.run(
+                    db,
+                    mode=settings.cache_warmup,
+                    recent=settings.cache_warmup_recent,
+                    chunk_size=settings.cache_warmup_chunk_size
+                )
+        except Exception:
+            logger.exception("Cache warm-up failed, falling back to lazy loading")
+    yield
+    status_writer.stop()
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
+app = FastAPI(title="Data Structures API", version="2.5", lifespan=lifespan)
 
 
 @app.exception_handler(EntityNotFoundError)
@@ -72,5 +98,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(products_router)
-app.include_router(orders_router)
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+
+if settings.db_async:
+    app.include_router(async_products_router)
+    app.include_router(async_orders_router)
+else:
+    app.include_router(products_router)
+    app.include_router(orders_router)
+app.include_router(analytics_router)
+app.include_router(diagnostics_router)
+app.include_router(metrics_router)
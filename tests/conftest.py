@@ -34,8 +34,7 @@ def db_session():
 
 @pytest.fixture(autouse=True)
 def reset_store():
-    store.products_root = None
-    store.orders_head = None
+    store.clear()
     yield
 
 
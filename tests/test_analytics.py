@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+from app.models import OrderItemResponse, OrderResponse
+from app.services import DataStore, store
+from app.services import order_aggregates
+
+
+@pytest.fixture
+def sales(client):
+    lamp = client.post("/products/", json={"name": "Lamp", "price": 10}).json()
+    desk = client.post("/products/", json={"name": "Desk", "price": 5.5}).json()
+    orders = [
+        [(lamp["id"], 2), (desk["id"], 1)],
+        [(lamp["id"], 1)],
+        [(desk["id"], 4)],
+    ]
+    ids = [
+        client.post("/orders/", json={"items": [{"product_id": p, "quantity": q} for p, q in items]}).json()["id"]
+        for items in orders
+    ]
+    client.put(f"/orders/{ids[2]}", json={"status": "Shipped"})
+    return lamp, desk
+
+
+@pytest.mark.parametrize("warm", [False, True])
+def test_analytics_endpoints(client, sales, warm):
+    lamp, desk = sales
+    store.clear()
+    if warm:
+        client.get("/orders/")
+        assert store.orders_complete
+
+    top = client.get("/analytics/top-products", params={"limit": 1}).json()
+    assert top == [{"product_id": desk["id"], "name": "Desk", "units": 5}]
+
+    statuses = client.get("/analytics/statuses").json()
+    assert statuses == [
+        {"status": "Pending", "orders": 2, "units": 4, "revenue": 35.5},
+        {"status": "Shipped", "orders": 1, "units": 4, "revenue": 22.0},
+    ]
+
+
+def test_aggregates_follow_order_changes(client, sales):
+    lamp, desk = sales
+    client.get("/orders/")
+    order = client.post("/orders/", json={"items": [{"product_id": lamp["id"], "quantity": 9}]}).json()
+
+    assert client.get("/analytics/top-products").json()[0] == {"product_id": lamp["id"], "name": "Lamp", "units": 12}
+
+    client.put(f"/orders/{order['id']}", json={"status": "Cancelled"})
+    client.delete(f"/orders/{order['id']}")
+    assert [s["status"] for s in client.get("/analytics/statuses").json()] == ["Pending", "Shipped"]
+    assert client.get("/analytics/top-products").json()[0]["units"] == 5
+
+
+@pytest.mark.parametrize("vectorized", [True, False])
+def test_rebuild_matches_incremental_totals(monkeypatch, vectorized):
+    if not vectorized:
+        monkeypatch.setattr(order_aggregates, "numpy", None)
+    rng = random.Random(7)
+    orders = [
+        OrderResponse(id=i, status=rng.choice(["Pending", "Shipped", "Delivered"]), items=[
+            OrderItemResponse(product_id=p, quantity=rng.randint(1, 5)) for p in rng.sample(range(1, 40), 3)
+        ])
+        for i in range(1, 301)
+    ]
+
+    incremental = DataStore()
+    for order in orders:
+        incremental.add_order(order)
+    incremental.remove_order(5)
+
+    rebuilt = DataStore()
+    rebuilt.add_orders([o for o in orders if o.id != 5], complete=True)
+
+    assert rebuilt.order_status_totals() == incremental.order_status_totals()
+    assert rebuilt.top_products_by_units(10) == incremental.top_products_by_units(10)
@@ -0,0 +1,162 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.database import database
+from app.database.database import Base
+from app.routes import async_orders_router, async_products_router
+from app.services import store
+from app.settings import get_settings
+from main import app
+
+
+@pytest.fixture
+def async_client(tmp_path, monkeypatch):
+    path = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=sync_engine)
+
+    # The routes run the real get_async_db dependency; only its session factory
+    # is pointed at an aiosqlite file database.
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    monkeypatch.setattr(database, "AsyncSessionLocal",
+                        async_sessionmaker(engine, autoflush=False, expire_on_commit=False))
+
+    async_app = FastAPI()
+    async_app.exception_handlers.update(app.exception_handlers)
+    async_app.include_router(async_products_router)
+    async_app.include_router(async_orders_router)
+
+    with TestClient(async_app) as c:
+        c.headers.update({"X-API-Key": get_settings().api_key_secret})
+        yield c
+
+    sync_engine.dispose()
+
+
+def test_async_product_lifecycle(async_client):
+    response = async_client.post("/products/", json={"name": "Tablet", "price": 300})
+    assert response.status_code == 201
+    product_id = response.json()["id"]
+
+    store.clear()
+    assert async_client.get(f"/products/{product_id}").json()["name"] == "Tablet"
+    assert async_client.get("/products/", params={"name": "tab"}).json()[0]["id"] == product_id
+    assert async_client.get("/products/99999").status_code == 404
+
+
+def test_async_order_lifecycle(async_client):
+    p1 = async_client.post("/products/", json={"name": "Pen", "price": 1}).json()["id"]
+    p2 = async_client.post("/products/", json={"name": "Ink", "price": 4}).json()["id"]
+
+    create = async_client.post("/orders/", json={"items": [{"product_id": p1, "quantity": 3}]})
+    assert create.status_code == 201
+    order_id = create.json()["id"]
+
+    missing = async_client.post("/orders/", json={"items": [{"product_id": 99999, "quantity": 1}]})
+    assert missing.status_code == 409
+
+    store.clear()
+    assert async_client.get(f"/orders/{order_id}").json()["items"] == [{"product_id": p1, "quantity": 3}]
+
+    store.clear()
+    listing = async_client.get("/orders/").json()
+    assert [o["id"] for o in listing] == [order_id]
+
+    update = async_client.put(f"/orders/{order_id}", json={"status": "Shipped", "items": [{"product_id": p2, "quantity": 1}]})
+    assert update.json() == {"id": order_id, "status": "Shipped", "items": [{"product_id": p2, "quantity": 1}]}
+
+    store.clear()
+    status_only = async_client.put(f"/orders/{order_id}", json={"status": "Delivered"})
+    assert status_only.json()["items"] == [{"product_id": p2, "quantity": 1}]
+
+    assert async_client.delete(f"/orders/{order_id}").status_code == 200
+    assert async_client.get(f"/orders/{order_id}").status_code == 404
+    assert async_client.delete(f"/orders/{order_id}").status_code == 404
+
+
+def test_async_bulk_endpoints(async_client):
+    products = async_client.post("/products/bulk", json=[{"name": "Cup", "price": 3}, {"name": "", "price": 1}]).json()
+    assert products["created"] == 1
+    assert [e["index"] for e in products["errors"]] == [1]
+
+    product_id = products["ids"][0]
+    body = "\n".join([
+        '{"items": [{"product_id": %d, "quantity": 1}]}' % product_id,
+        '{"items": [{"product_id": 424242, "quantity": 1}]}',
+    ])
+    orders = async_client.post("/orders/bulk", content=body, headers={"Content-Type": "application/x-ndjson"}).json()
+    assert orders["created"] == 1
+    assert orders["errors"][0]["index"] == 1
+
+    store.clear()
+    assert async_client.get(f"/orders/{orders['ids'][0]}").json()["items"][0]["product_id"] == product_id
+
+
+def test_async_listings_stream_ndjson(async_client):
+    product_id = async_client.post("/products/", json={"name": "Kettle", "price": 25}).json()["id"]
+    for _ in range(3):
+        async_client.post("/orders/", json={"items": [{"product_id": product_id, "quantity": 1}]})
+    store.clear()
+
+    orders = async_client.get("/orders/", headers={"Accept": "application/x-ndjson"})
+    assert orders.headers["content-type"] == "application/x-ndjson"
+    assert len(orders.text.splitlines()) == 3
+
+    products = async_client.get("/products/", params={"stream": True})
+    assert [json.loads(line)["name"] for line in products.text.splitlines()] == ["Kettle"]
+
+
+def test_async_product_orders(async_client):
+    product_id = async_client.post("/products/", json={"name": "Kettle", "price": 25}).json()["id"]
+    order_id = async_client.post("/orders/", json={"items": [{"product_id": product_id, "quantity": 1}]}).json()["id"]
+    store.clear()
+
+    assert [o["id"] for o in async_client.get(f"/products/{product_id}/orders").json()] == [order_id]
+    async_client.get("/orders/")
+    assert [o["id"] for o in async_client.get(f"/products/{product_id}/orders").json()] == [order_id]
+
+
+def test_async_orders_by_status(async_client):
+    product_id = async_client.post("/products/", json={"name": "Kettle", "price": 25}).json()["id"]
+    ids = [async_client.post("/orders/", json={"items": [{"product_id": product_id, "quantity": 1}]}).json()["id"]
+           for _ in range(2)]
+    async_client.put(f"/orders/{ids[1]}", json={"status": "Delivered"})
+    store.clear()
+
+    assert [o["id"] for o in async_client.get("/orders/", params={"status": "Delivered"}).json()] == ids[1:]
+
+
+def test_async_conditional_get(async_client):
+    product_id = async_client.post("/products/", json={"name": "Kettle", "price": 25}).json()["id"]
+    order_id = async_client.post("/orders/", json={"items": [{"product_id": product_id, "quantity": 1}]}).json()["id"]
+    store.clear()
+
+    for path in (f"/products/{product_id}", f"/orders/{order_id}"):
+        etag = async_client.get(path).headers["etag"]
+        assert async_client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_get_async_db_yields_and_closes_an_aiosqlite_session(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'dependency.db'}", poolclass=NullPool)
+    monkeypatch.setattr(database, "AsyncSessionLocal", async_sessionmaker(engine, expire_on_commit=False))
+
+    async def scenario():
+        dependency = database.get_async_db()
+        db = await anext(dependency)
+        assert isinstance(db, AsyncSession)
+        assert await db.scalar(text("SELECT 1")) == 1
+        assert db.in_transaction()
+
+        with pytest.raises(StopAsyncIteration):
+            await anext(dependency)
+        assert not db.in_transaction()
+        await engine.dispose()
+
+    asyncio.run(scenario())
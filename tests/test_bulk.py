@@ -0,0 +1,67 @@
+import json
+
+from sqlalchemy import event
+
+from app.services import store
+from app.settings import get_settings
+
+
+def test_bulk_products_from_json_array(client, db_session, monkeypatch):
+    monkeypatch.setattr(get_settings(), "bulk_chunk_size", 3)
+    rows = [{"name": f"Bolt {i}", "price": 1 + i} for i in range(5)]
+    rows.insert(2, {"name": "X", "price": 1})
+    rows.insert(4, {"name": "Nut", "price": -3})
+
+    commits = []
+    engine = db_session.get_bind()
+
+    def count_commit(conn):
+        commits.append(conn)
+
+    event.listen(engine, "commit", count_commit)
+    try:
+        response = client.post("/products/bulk", json=rows)
+    finally:
+        event.remove(engine, "commit", count_commit)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 5
+    assert [e["index"] for e in data["errors"]] == [2, 4]
+    assert "name" in data["errors"][0]["message"]
+    assert len(commits) == 3
+
+    assert store.find_product(data["ids"][-1]).name == "Bolt 4"
+    assert client.get(f"/products/{data['ids'][0]}").json()["name"] == "Bolt 0"
+
+
+def test_bulk_orders_from_ndjson_stream(client):
+    product_id = client.post("/products/", json={"name": "Washer", "price": 2}).json()["id"]
+    lines = [
+        json.dumps({"items": [{"product_id": product_id, "quantity": 2}]}),
+        "{not json",
+        json.dumps({"items": [{"product_id": 9999, "quantity": 1}]}),
+        "",
+        json.dumps({"items": [{"product_id": product_id, "quantity": 5}]}),
+    ]
+
+    def body():
+        for line in lines:
+            yield (line + "\n").encode()
+
+    response = client.post("/orders/bulk", content=body(), headers={"Content-Type": "application/x-ndjson"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert [(e["index"], "does not exist" in e["message"]) for e in data["errors"]] == [(1, False), (2, True)]
+
+    store.clear()
+    orders = client.get("/orders/").json()
+    assert [o["id"] for o in orders] == data["ids"]
+    assert [o["items"][0]["quantity"] for o in orders] == [2, 5]
+
+
+def test_bulk_rejects_non_array_body(client):
+    response = client.post("/products/bulk", json={"name": "Single", "price": 1})
+    assert response.status_code == 422
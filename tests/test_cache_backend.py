@@ -0,0 +1,182 @@
+import multiprocessing
+import os
+
+import pytest
+
+from app.models import OrderItemResponse, OrderResponse, ProductResponse
+from app.services.cache_backend import SharedMemoryBackend, ORDER_EVENT, RESET_EVENT
+from app.services.store_manager import DataStore
+
+
+def worker_process(path: str, slots: int, ring_size: int):
+    backend = SharedMemoryBackend(path=path, slots=slots, ring_size=ring_size)
+    backend.put_product(ProductResponse(id=7, name="Shared Monitor", price=199.5, description="27 inches"))
+    backend.publish(ORDER_EVENT, 9)
+    backend.close()
+
+
+def test_products_and_events_cross_process_boundaries(tmp_path):
+    path = str(tmp_path / "cache.bin")
+    backend = SharedMemoryBackend(path=path, slots=64, ring_size=16)
+
+    process = multiprocessing.get_context("spawn").Process(target=worker_process, args=(path, 64, 16))
+    process.start()
+    process.join(timeout=30)
+    assert process.exitcode == 0
+
+    product = backend.get_product(7)
+    assert product.name == "Shared Monitor"
+    assert product.description == "27 inches"
+    assert backend.slots == 64
+    assert backend.poll() == [(ORDER_EVENT, 9)]
+    assert backend.poll() == []
+    backend.close()
+
+
+def test_colliding_ids(tmp_path):
+    backend = SharedMemoryBackend(path=str(tmp_path / "cache.bin"), slots=8, ring_size=4)
+    for product_id in (3, 11, 19):
+        backend.put_product(ProductResponse(id=product_id, name=f"Item {product_id}", price=1))
+
+    assert backend.get_product(3).name == "Item 3"
+    assert backend.get_product(11).name == "Item 11"
+    assert backend.get_product(19).name == "Item 19"
+    assert backend.get_product(27) is None
+    backend.close()
+
+
+def test_lagging_reader_gets_reset(tmp_path):
+    path = str(tmp_path / "cache.bin")
+    writer = SharedMemoryBackend(path=path, slots=8, ring_size=4)
+    reader = SharedMemoryBackend(path=path, slots=8, ring_size=4)
+
+    for order_id in range(10):
+        writer.publish(ORDER_EVENT, order_id)
+
+    assert writer.poll() == []
+    assert reader.poll() == [(RESET_EVENT, 0)]
+    writer.close()
+    reader.close()
+
+
+def test_first_user_resets_a_stale_table(tmp_path):
+    path = str(tmp_path / "cache.bin")
+    previous_run = SharedMemoryBackend(path=path, slots=8, ring_size=4)
+    previous_run.put_product(ProductResponse(id=3, name="Stale", price=1))
+    previous_run.publish(ORDER_EVENT, 1)
+    previous_run.close()
+
+    backend = SharedMemoryBackend(path=path, slots=8, ring_size=4)
+    assert backend.get_product(3) is None
+    assert backend._event_seq() == 0
+    backend.close()
+
+    resized = SharedMemoryBackend(path=path, slots=16, ring_size=8)
+    assert resized.slots == 16
+    resized.close()
+
+
+def test_live_table_rejects_other_layouts_and_databases(tmp_path):
+    path = str(tmp_path / "cache.bin")
+    backend = SharedMemoryBackend(path=path, slots=8, ring_size=4, database_url="sqlite:///a.db")
+
+    for slots, ring_size, url in ((16, 4, "sqlite:///a.db"), (8, 8, "sqlite:///a.db"), (8, 4, "sqlite:///b.db")):
+        with pytest.raises(RuntimeError):
+            SharedMemoryBackend(path=path, slots=slots, ring_size=ring_size, database_url=url)
+
+    backend.put_product(ProductResponse(id=3, name="Lamp", price=1))
+    other = SharedMemoryBackend(path=path, slots=8, ring_size=4, database_url="sqlite:///a.db")
+    assert other.get_product(3).name == "Lamp"
+    other.close()
+    backend.close()
+
+
+def test_default_path_depends_on_the_database():
+    paths = []
+    for url in ("sqlite:///a.db", "sqlite:///b.db"):
+        backend = SharedMemoryBackend(slots=8, ring_size=4, database_url=url)
+        paths.append(backend.path)
+        backend.close()
+        os.remove(backend.path)
+        os.remove(backend.path + ".users")
+
+    assert paths[0] != paths[1]
+
+
+def test_writes_in_one_store_invalidate_the_other(tmp_path):
+    path = str(tmp_path / "cache.bin")
+    worker_a = DataStore(backend=SharedMemoryBackend(path=path))
+    worker_b = DataStore(backend=SharedMemoryBackend(path=path))
+
+    order = OrderResponse(id=1, status="Pending", items=[OrderItemResponse(product_id=1, quantity=1)])
+    worker_a.add_order(order)
+    worker_b.add_orders([order], complete=True)
+
+    worker_a.add_order(order.model_copy(update={"status": "Shipped"}))
+    worker_a.publish_order(1)
+
+    assert worker_b.get_order(1) is None
+    assert not worker_b.orders_complete
+
+    worker_b.remember_missing_products([5])
+    assert worker_b.is_missing_product(5)
+
+    worker_a.insert_product(ProductResponse(id=5, name="Desk", price=80))
+    worker_a.publish_product(5)
+    assert not worker_b.is_missing_product(5)
+    assert worker_b.find_product(5).name == "Desk"
+    assert worker_b.stats()["products"]["entries"] == 1
+
+    worker_a.backend.close()
+    worker_b.backend.close()
+
+
+def test_bulk_chunks_publish_one_event(tmp_path):
+    path = str(tmp_path / "cache.bin")
+    worker_a = DataStore(backend=SharedMemoryBackend(path=path, slots=256, ring_size=16))
+    worker_b = DataStore(backend=SharedMemoryBackend(path=path, slots=256, ring_size=16))
+    worker_b.load_products([ProductResponse(id=1, name="Lamp", price=10)], complete=True)
+    worker_b.add_orders([], complete=True)
+    worker_b.remember_missing_products([40])
+    worker_b.remember_missing_orders([40])
+
+    products = [ProductResponse(id=i, name=f"Item {i}", price=1) for i in range(2, 102)]
+    worker_a.insert_products(products)
+    worker_a.publish_created_products([p.id for p in products])
+    worker_a.publish_created_orders(list(range(1, 101)))
+
+    assert worker_b.find_product(40).name == "Item 40"
+    assert worker_b.products_complete
+    assert len(worker_b.search_products(limit=1000)) == 101
+    assert not worker_b.is_missing_order(40)
+    assert not worker_b.orders_complete
+
+    worker_a.publish_created_products([200, 202])
+    worker_b.sync()
+    assert not worker_b.products_complete
+
+    worker_a.backend.close()
+    worker_b.backend.close()
+
+
+def test_complete_stores_trust_absence_only_with_shared_events(tmp_path):
+    worker_a, worker_b = DataStore(), DataStore()
+    for worker in (worker_a, worker_b):
+        worker.add_orders([OrderResponse(id=1, status="Pending", items=[])], complete=True)
+    worker_b.add_order(OrderResponse(id=2, status="Pending", items=[]))
+    assert worker_a.get_order(2) is None
+    assert not worker_a.is_missing_order(2)
+
+    path = str(tmp_path / "cache.bin")
+    shared_a = DataStore(backend=SharedMemoryBackend(path=path))
+    shared_b = DataStore(backend=SharedMemoryBackend(path=path))
+    shared_a.load_products([ProductResponse(id=1, name="Lamp", price=10)], complete=True)
+    assert shared_a.is_missing_product(2)
+
+    shared_b.insert_product(ProductResponse(id=2, name="Desk", price=80))
+    shared_b.publish_product(2)
+    assert not shared_a.is_missing_product(2)
+    assert shared_a.find_product(2).name == "Desk"
+
+    shared_a.backend.close()
+    shared_b.backend.close()
@@ -0,0 +1,19 @@
+def test_cache_stats_report_hits_and_misses(client):
+    create_resp = client.post("/products/", json={"name": "Keyboard", "price": 30})
+    product_id = create_resp.json()["id"]
+
+    client.get(f"/products/{product_id}")
+    client.get("/products/99999")
+
+    response = client.get("/diagnostics/cache")
+    assert response.status_code == 200
+    products = response.json()["products"]
+    assert products["hits"] == 1
+    assert products["misses"] == 1
+    assert products["entries"] == 1
+
+
+def test_cache_stats_require_api_key(client):
+    del client.headers["X-API-Key"]
+    response = client.get("/diagnostics/cache")
+    assert response.status_code == 401
@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.metrics import registry
+from app.services import store
+
+
+def _timings(response) -> dict:
+    entries = {}
+    for entry in response.headers["server-timing"].split(", "):
+        name, _, params = entry.partition(";")
+        entries[name] = params
+    return entries
+
+
+def test_server_timing_separates_memory_hits_from_sql_misses(client):
+    product_id = client.post("/products/", json={"name": "Monitor", "price": 150}).json()["id"]
+
+    hit = _timings(client.get(f"/products/{product_id}"))
+    assert "memory" in hit
+    assert "sql" not in hit
+
+    store.clear()
+
+    miss = _timings(client.get(f"/products/{product_id}"))
+    assert 'desc="1 statements"' in miss["sql"]
+    assert "serialize" in miss
+    assert "total" in miss
+
+
+def test_metrics_endpoint_exports_prometheus_text(client):
+    registry.clear()
+    product_id = client.post("/products/", json={"name": "Mouse", "price": 20}).json()["id"]
+    client.get(f"/products/{product_id}")
+    client.get("/products/99999")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+    body = response.text
+    assert 'app_requests_total{method="GET",route="/products/{product_id}",status="200"} 1' in body
+    assert 'app_requests_total{method="GET",route="/products/{product_id}",status="404"} 1' in body
+    assert 'app_operation_duration_seconds_count{operation="memory"}' in body
+    assert 'app_sql_statements_per_request_count{method="POST",route="/products/"} 1' in body
+    assert 'app_cache_hits_total{entity="products"} 1' in body
+    assert 'app_cache_misses_total{entity="products"} 1' in body
+
+
+def test_metrics_require_api_key(client):
+    del client.headers["X-API-Key"]
+    assert client.get("/metrics").status_code == 401
+
+
+def test_failed_statements_leave_no_timing_state_on_the_connection(db_session):
+    registry.clear()
+    connection = db_session.connection()
+    with pytest.raises(OperationalError):
+        connection.execute(text("SELECT * FROM missing_table"))
+    db_session.rollback()
+
+    connection = db_session.connection()
+    connection.execute(text("SELECT 1"))
+    assert "metrics_started" not in connection.info
+    assert registry.counter("app_sql_statements_total").value == 1
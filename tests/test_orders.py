@@ -1,4 +1,10 @@
+import json
+
 import pytest
+from sqlalchemy import event
+
+from app.models import OrderItemResponse, OrderResponse
+from app.services import DataStore, store
 
 
 @pytest.fixture
@@ -96,3 +102,208 @@ def test_delete_order(client, product_iphone):
 
     get_resp = client.get(f"/orders/{order_id}")
     assert get_resp.status_code == 404
+
+
+def test_create_order_uses_single_transaction(client, db_session, product_iphone, product_charger):
+    statements = []
+    commits = []
+    engine = db_session.get_bind()
+
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, executemany))
+
+    def count_commit(conn):
+        commits.append(conn)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    event.listen(engine, "commit", count_commit)
+    try:
+        payload = {
+            "items": [
+                {"product_id": product_iphone["id"], "quantity": 1},
+                {"product_id": product_charger["id"], "quantity": 3}
+            ]
+        }
+        response = client.post("/orders/", json=payload)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+        event.remove(engine, "commit", count_commit)
+
+    assert response.status_code == 201
+    assert len(commits) == 1
+    assert [s.split()[0] for s, _ in statements] == ["INSERT", "INSERT"]
+    assert statements[1][1] is True
+    assert response.json()["items"][1] == {"product_id": product_charger["id"], "quantity": 3}
+
+
+def test_list_orders_keyset_pagination(client, product_iphone):
+    payload = {"items": [{"product_id": product_iphone["id"], "quantity": 1}]}
+    created_ids = [client.post("/orders/", json=payload).json()["id"] for _ in range(5)]
+
+    first_page = client.get("/orders/", params={"limit": 2}).json()
+    assert [o["id"] for o in first_page] == created_ids[:2]
+
+    second_page = client.get("/orders/", params={"limit": 2, "after": first_page[-1]["id"]}).json()
+    assert [o["id"] for o in second_page] == created_ids[2:4]
+
+    client.get("/orders/")
+    warm_page = client.get("/orders/", params={"limit": 10, "after": created_ids[3]}).json()
+    assert [o["id"] for o in warm_page] == created_ids[4:]
+
+
+def test_cold_list_orders_runs_two_queries(client, db_session, product_iphone, product_charger):
+    payload = {"items": [{"product_id": product_iphone["id"], "quantity": 1},
+                         {"product_id": product_charger["id"], "quantity": 1}]}
+    for _ in range(3):
+        client.post("/orders/", json=payload)
+    store.clear()
+
+    statements = []
+    engine = db_session.get_bind()
+
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        response = client.get("/orders/")
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+    assert len(response.json()) == 3
+    assert all(len(o["items"]) == 2 for o in response.json())
+    assert len(statements) == 2
+
+
+def test_missing_orders_and_products_skip_sql_on_retry(client, db_session, product_iphone):
+    order_id = client.post("/orders/", json={"items": [{"product_id": product_iphone["id"], "quantity": 1}]}).json()["id"]
+    assert client.delete(f"/orders/{order_id}").status_code == 200
+    assert client.post("/orders/", json={"items": [{"product_id": 9999, "quantity": 1}]}).status_code == 409
+    assert client.get("/orders/4242").status_code == 404
+
+    statements = []
+    engine = db_session.get_bind()
+
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        assert client.get(f"/orders/{order_id}").status_code == 404
+        assert client.get("/orders/4242").status_code == 404
+        assert client.post("/orders/", json={"items": [{"product_id": 9999, "quantity": 1}]}).status_code == 409
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+    assert statements == []
+
+
+@pytest.mark.parametrize("warm", [False, True])
+def test_list_orders_streams_ndjson(client, product_iphone, warm):
+    payload = {"items": [{"product_id": product_iphone["id"], "quantity": 2}]}
+    created_ids = [client.post("/orders/", json=payload).json()["id"] for _ in range(5)]
+    store.clear()
+    if warm:
+        client.get("/orders/")
+
+    response = client.get("/orders/", params={"stream": True, "after": created_ids[0], "limit": 3})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    orders = [json.loads(line) for line in response.text.splitlines()]
+    assert [o["id"] for o in orders] == created_ids[1:4]
+    assert orders[0]["items"] == [{"product_id": product_iphone["id"], "quantity": 2}]
+
+
+def test_iter_orders_resumes_from_last_id():
+    data_store = DataStore()
+    data_store.add_orders([OrderResponse(id=i, status="Pending", items=[]) for i in range(1, 8)], complete=True)
+
+    assert [o.id for o in data_store.iter_orders(after=2, chunk_size=2)] == [3, 4, 5, 6, 7]
+    assert [o.id for o in data_store.iter_orders(limit=3, chunk_size=2)] == [1, 2, 3]
+
+
+@pytest.mark.parametrize("warm", [False, True])
+def test_list_orders_of_a_product(client, product_iphone, product_charger, warm):
+    both = [{"product_id": product_iphone["id"], "quantity": 1}, {"product_id": product_charger["id"], "quantity": 1}]
+    only_charger = [{"product_id": product_charger["id"], "quantity": 2}]
+    ids = [client.post("/orders/", json={"items": items}).json()["id"] for items in (both, only_charger, both, both)]
+    store.clear()
+    if warm:
+        client.get("/orders/")
+
+    response = client.get(f"/products/{product_iphone['id']}/orders", params={"after": ids[0], "limit": 1})
+    assert [o["id"] for o in response.json()] == [ids[2]]
+    response = client.get(f"/products/{product_charger['id']}/orders")
+    assert [o["id"] for o in response.json()] == ids
+    assert client.get("/products/999/orders").status_code == 404
+
+
+def test_product_posting_lists_follow_order_changes():
+    data_store = DataStore()
+    item = OrderItemResponse
+    data_store.add_orders([
+        OrderResponse(id=3, status="Pending", items=[item(product_id=1, quantity=1)]),
+        OrderResponse(id=1, status="Pending", items=[item(product_id=1, quantity=1), item(product_id=2, quantity=1)]),
+    ], complete=True)
+    data_store.add_order(OrderResponse(id=2, status="Pending", items=[item(product_id=1, quantity=1)]))
+
+    assert [o.id for o in data_store.get_orders_by_product(1)] == [1, 2, 3]
+
+    data_store.update_order_node(OrderResponse(id=1, status="Pending", items=[item(product_id=2, quantity=4)]))
+    data_store.remove_order(3)
+    assert [o.id for o in data_store.get_orders_by_product(1)] == [2]
+    assert [o.id for o in data_store.get_orders_by_product(2)] == [1]
+
+
+def test_orders_with_repeated_product_lines_are_posted_once():
+    data_store = DataStore()
+    lines = [OrderItemResponse(product_id=1, quantity=1), OrderItemResponse(product_id=1, quantity=2)]
+    data_store.add_orders([OrderResponse(id=1, status="Pending", items=lines)], complete=True)
+
+    assert [o.id for o in data_store.get_orders_by_product(1)] == [1]
+    data_store.remove_order(1)
+    assert data_store.get_orders_by_product(1) == []
+
+
+@pytest.mark.parametrize("warm", [False, True])
+def test_list_orders_by_status(client, product_iphone, warm):
+    items = [{"product_id": product_iphone["id"], "quantity": 1}]
+    ids = [client.post("/orders/", json={"items": items}).json()["id"] for _ in range(5)]
+    for order_id in ids[1:]:
+        client.put(f"/orders/{order_id}", json={"status": "Shipped"})
+    store.clear()
+    if warm:
+        client.get("/orders/")
+
+    response = client.get("/orders/", params={"status": "Shipped", "after": ids[1], "limit": 2})
+    assert [o["id"] for o in response.json()] == ids[2:4]
+    assert [o["id"] for o in client.get("/orders/", params={"status": "Pending"}).json()] == ids[:1]
+    assert client.get("/orders/", params={"status": "Delivered"}).json() == []
+    streamed = client.get("/orders/", params={"status": "Shipped", "stream": True})
+    assert [json.loads(line)["id"] for line in streamed.text.splitlines()] == ids[1:]
+    assert client.get("/orders/", params={"status": "Lost"}).status_code == 422
+
+
+def test_status_posting_lists_follow_order_changes():
+    data_store = DataStore()
+    item = [OrderItemResponse(product_id=1, quantity=1)]
+    data_store.add_orders([OrderResponse(id=i, status="Pending", items=item) for i in (1, 2, 3)], complete=True)
+
+    data_store.update_order_node(OrderResponse(id=2, status="Shipped", items=item))
+    data_store.remove_order(3)
+    assert [o.id for o in data_store.get_orders_page(status="Pending")] == [1]
+    assert [o.id for o in data_store.get_orders_page(status="Shipped")] == [2]
+    assert [o.id for o in data_store.iter_orders(status="Shipped")] == [2]
+
+
+def test_get_order_etag_changes_on_update(client, product_iphone):
+    order = client.post("/orders/", json={"items": [{"product_id": product_iphone["id"], "quantity": 1}]}).json()
+    etag = client.get(f"/orders/{order['id']}").headers["etag"]
+    assert client.get(f"/orders/{order['id']}", headers={"If-None-Match": etag}).status_code == 304
+
+    client.put(f"/orders/{order['id']}", json={"status": "Shipped"})
+    response = client.get(f"/orders/{order['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["status"] == "Shipped"
+
+    client.delete(f"/orders/{order['id']}")
+    assert client.get(f"/orders/{order['id']}", headers={"If-None-Match": response.headers["etag"]}).status_code == 404
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import database
+from app.database.database import engine_options
+from app.database.pool import TimedQueuePool, pool_status
+from app.settings import get_settings
+from tests.conftest import engine as test_engine
+
+
+def test_cache_hits_never_check_out_a_connection(client):
+    product_id = client.post("/products/", json={"name": "Lamp", "price": 25}).json()["id"]
+    order_id = client.post("/orders/", json={"items": [{"product_id": product_id, "quantity": 1}]}).json()["id"]
+
+    checkouts = []
+    listener = lambda *args: checkouts.append(1)  # noqa: E731
+    event.listen(test_engine, "checkout", listener)
+    try:
+        assert client.get(f"/products/{product_id}").status_code == 200
+        assert client.get(f"/orders/{order_id}").status_code == 200
+        assert checkouts == []
+
+        assert client.get("/products/99999").status_code == 404
+        assert len(checkouts) == 1
+    finally:
+        event.remove(test_engine, "checkout", listener)
+
+
+def test_pool_settings_and_acquire_stats(tmp_path):
+    settings = get_settings().model_copy(update={"db_pool_size": 1, "db_max_overflow": 0, "db_pool_timeout": 0.05})
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    pooled = create_engine(url, **engine_options(url, settings))
+    assert isinstance(pooled.pool, TimedQueuePool)
+
+    with pooled.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        status = pool_status(pooled.pool)
+        assert status["checked_out"] == 1
+        assert status["acquired"] == 1
+
+        with pytest.raises(exc.TimeoutError):
+            pooled.connect()
+
+    status = pool_status(pooled.pool)
+    assert status["checked_out"] == 0
+    assert status["timeouts"] == 1
+    assert status["acquire_seconds_max"] >= 0.05
+    pooled.dispose()
+
+
+def test_pool_diagnostics_endpoint(client):
+    response = client.get("/diagnostics/pool")
+    assert response.status_code == 200
+    assert "pool" in response.json()["sync"]
+
+
+def test_get_db_releases_the_connection_it_used(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path / 'dependency.db'}"
+    pooled = create_engine(url, **engine_options(url, get_settings()))
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=pooled))
+
+    async def request(query: bool):
+        dependency = database.get_db()
+        db = await anext(dependency)
+        if query:
+            assert db.execute(text("SELECT 1")).scalar() == 1
+        with pytest.raises(StopAsyncIteration):
+            await anext(dependency)
+
+    asyncio.run(request(query=False))
+    assert pool_status(pooled.pool)["acquired"] == 0
+    asyncio.run(request(query=True))
+    assert pool_status(pooled.pool)["acquired"] == 1
+    assert pool_status(pooled.pool)["checked_out"] == 0
+    pooled.dispose()
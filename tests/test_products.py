@@ -1,3 +1,12 @@
+import json
+
+import pytest
+from sqlalchemy import event
+
+from app.models import ProductCreate, ProductResponse
+from app.services import CacheWarmup, DataStore, ProductService, store
+
+
 def test_create_product_success(client):
     payload = {
         "name": "Iphone 15",
@@ -37,3 +46,180 @@ def test_product_auth_failure(client):
     del client.headers["X-API-Key"]
     response = client.get("/products/1")
     assert response.status_code == 401
+
+
+def test_get_many_loads_all_misses_with_one_query(db_session):
+    created = [
+        ProductService.create(db_session, ProductCreate(name=f"Cable {i}", price=5))
+        for i in range(5)
+    ]
+    store.clear()
+
+    statements = []
+    engine = db_session.get_bind()
+
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        ids = [p.id for p in created]
+        products = ProductService.get_many(db_session, ids + [99999])
+        assert sorted(products) == sorted(ids)
+        assert len(statements) == 1
+
+        ProductService.get_many(db_session, ids)
+        assert len(statements) == 1
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+
+def test_missing_product_is_queried_once_until_created(client, db_session):
+    statements = []
+    engine = db_session.get_bind()
+
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        for _ in range(3):
+            assert client.get("/products/1").status_code == 404
+        assert len(statements) == 1
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+    assert client.post("/products/", json={"name": "Late", "price": 3}).json()["id"] == 1
+    assert client.get("/products/1").status_code == 200
+
+
+@pytest.fixture
+def catalog(client):
+    items = [("Gaming Mouse", 40), ("Gaming Laptop", 1500), ("Office Chair", 120), ("Game_Pad", 35)]
+    return [client.post("/products/", json={"name": n, "price": p}).json() for n, p in items]
+
+
+@pytest.mark.parametrize("warm", [False, True])
+def test_search_products_by_prefix_and_price(client, db_session, catalog, warm):
+    store.clear()
+    if warm:
+        CacheWarmup.run(db_session, mode="products")
+
+    response = client.get("/products/", params={"name": "gam", "sort": "-price"})
+    assert response.status_code == 200
+    assert [p["name"] for p in response.json()] == ["Gaming Laptop", "Gaming Mouse", "Game_Pad"]
+
+    response = client.get("/products/", params={"min_price": 35, "max_price": 120, "sort": "price", "limit": 2})
+    assert [p["price"] for p in response.json()] == [35, 40]
+
+    response = client.get("/products/", params={"name": "game_", "max_price": 100})
+    assert [p["name"] for p in response.json()] == ["Game_Pad"]
+
+    response = client.get("/products/", params={"sort": "name", "offset": 3})
+    assert [p["name"] for p in response.json()] == ["Office Chair"]
+
+
+def test_search_products_rejects_unknown_sort(client):
+    response = client.get("/products/", params={"sort": "description"})
+    assert response.status_code == 422
+
+
+def test_search_index_follows_replacements_and_evictions():
+    data_store = DataStore(max_products=2)
+    data_store.load_products([ProductResponse(id=1, name="Lamp", price=10)], complete=True)
+    data_store.insert_product(ProductResponse(id=1, name="Desk Lamp", price=15))
+    data_store.insert_product(ProductResponse(id=2, name="Desk", price=90))
+    data_store.insert_product(ProductResponse(id=3, name="Desk Mat", price=20))
+
+    assert [p.id for p in data_store.search_products(name_prefix="desk")] == [2, 3]
+    assert [p.id for p in data_store.search_products(min_price=15, max_price=20)] == [3]
+    assert not data_store.products_complete
+
+
+@pytest.mark.parametrize("warm", [False, True])
+def test_search_products_streams_ndjson(client, db_session, catalog, warm):
+    store.clear()
+    if warm:
+        CacheWarmup.run(db_session, mode="products")
+
+    response = client.get("/products/", params={"stream": True, "sort": "-price"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert [json.loads(line)["price"] for line in lines] == [1500, 120, 40, 35]
+
+    response = client.get("/products/", params={"name": "gam", "offset": 1, "limit": 1},
+                          headers={"Accept": "application/x-ndjson"})
+    assert [json.loads(line)["name"] for line in response.text.splitlines()] == ["Gaming Laptop"]
+
+
+def test_iter_products_reads_in_chunks():
+    data_store = DataStore()
+    data_store.load_products([ProductResponse(id=i, name=f"P{i}", price=i) for i in range(1, 8)], complete=True)
+
+    assert [p.id for p in data_store.iter_products(sort="-price", offset=1, chunk_size=2)] == [6, 5, 4, 3, 2, 1]
+
+
+def test_get_product_serves_encoded_cache_entry(client):
+    product = client.post("/products/", json={"name": "Lamp", "price": 12.5}).json()
+    store.clear()
+
+    cold = client.get(f"/products/{product['id']}")
+    warm = client.get(f"/products/{product['id']}")
+
+    assert cold.headers["content-type"] == "application/json"
+    assert cold.content == warm.content == ProductResponse(**product).model_dump_json().encode()
+    assert store.find_product(product["id"], as_json=True) == warm.content
+
+
+def test_get_product_revalidates_with_etag(client, db_session):
+    product = client.post("/products/", json={"name": "Lamp", "price": 12.5}).json()
+    store.clear()
+
+    cold = client.get(f"/products/{product['id']}")
+    etag = cold.headers["etag"]
+    assert cold.headers["cache-control"] == "private, no-cache"
+    assert client.get(f"/products/{product['id']}").headers["etag"] == etag
+
+    statements = []
+    engine = db_session.get_bind()
+
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        for header in (etag, f'"other", W/{etag}', "*"):
+            response = client.get(f"/products/{product['id']}", headers={"If-None-Match": header})
+            assert response.status_code == 304
+            assert response.content == b""
+            assert response.headers["etag"] == etag
+        assert statements == []
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+    store.insert_product(ProductResponse(id=product["id"], name="Desk Lamp", price=12.5))
+    changed = client.get(f"/products/{product['id']}", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["name"] == "Desk Lamp"
+    assert changed.headers["etag"] != etag
+
+    # Reloaded from SQL, which still holds the original content, so the original tag applies again.
+    store.clear()
+    reloaded = client.get(f"/products/{product['id']}", headers={"If-None-Match": changed.headers["etag"]})
+    assert reloaded.status_code == 200
+    assert reloaded.headers["etag"] == etag
+    assert client.get(f"/products/{product['id']}", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_conditional_gets_count_one_lookup_per_request(client):
+    product = client.post("/products/", json={"name": "Lamp", "price": 12.5}).json()
+    store.clear()
+
+    etag = client.get(f"/products/{product['id']}").headers["etag"]
+    assert (store.product_stats.hits, store.product_stats.misses) == (0, 1)
+
+    client.get(f"/products/{product['id']}", headers={"If-None-Match": '"stale"'})
+    assert (store.product_stats.hits, store.product_stats.misses) == (1, 1)
+
+    assert client.get(f"/products/{product['id']}", headers={"If-None-Match": etag}).status_code == 304
+    assert (store.product_stats.hits, store.product_stats.misses) == (1, 1)
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.errors import EntityNotFoundError
+from app.services import ProductService, store
+from app.services.product_service import product_loads
+from app.services.single_flight import SingleFlight
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_share_one_load():
+    flight = SingleFlight("test-threads")
+    release = threading.Event()
+    calls = []
+    shared_before = flight._shared.value
+
+    def loader():
+        calls.append(1)
+        release.wait()
+        return "value"
+
+    with ThreadPoolExecutor(8) as pool:
+        results = [pool.submit(flight.do, "key", loader) for _ in range(8)]
+        wait_for(lambda: flight._shared.value - shared_before == 7)
+        release.set()
+        assert [r.result() for r in results] == ["value"] * 8
+
+    assert len(calls) == 1
+    assert flight.do("key", lambda: "reloaded") == "reloaded"
+
+
+def test_waiters_receive_the_loader_error():
+    flight = SingleFlight("test-errors")
+    release = threading.Event()
+    shared_before = flight._shared.value
+
+    def loader():
+        release.wait()
+        raise EntityNotFoundError(entity="Product", identifier="1")
+
+    with ThreadPoolExecutor(4) as pool:
+        results = [pool.submit(flight.do, 1, loader) for _ in range(4)]
+        wait_for(lambda: flight._shared.value - shared_before == 3)
+        release.set()
+        for result in results:
+            with pytest.raises(EntityNotFoundError):
+                result.result()
+
+
+def test_coroutines_share_one_load_and_survive_a_cancelled_loader():
+    flight = SingleFlight("test-async")
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def scenario():
+        assert await asyncio.gather(*(flight.do_async("key", loader) for _ in range(5))) == [1] * 5
+
+        leader = asyncio.create_task(flight.do_async("key", loader))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do_async("key", loader))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await waiter == 3
+        assert leader.cancelled()
+
+    asyncio.run(scenario())
+    assert len(calls) == 3
+
+
+def test_concurrent_product_misses_run_one_query(client, monkeypatch):
+    product = client.post("/products/", json={"name": "Lamp", "price": 12.5}).json()
+    store.clear()
+
+    release = threading.Event()
+    loads = []
+    load = ProductService._load
+
+    def slow_load(db, product_id):
+        loads.append(product_id)
+        release.wait()
+        return load(db, product_id)
+
+    monkeypatch.setattr(ProductService, "_load", staticmethod(slow_load))
+    shared_before = product_loads._shared.value
+    with ThreadPoolExecutor(6) as pool:
+        responses = [pool.submit(client.get, f"/products/{product['id']}") for _ in range(6)]
+        wait_for(lambda: product_loads._shared.value - shared_before == 5)
+        release.set()
+        assert {r.result().status_code for r in responses} == {200}
+
+    assert loads == [product["id"]]
+    assert store.stats()["products"]["entries"] == 1
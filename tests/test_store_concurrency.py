@@ -0,0 +1,107 @@
+import random
+import threading
+
+from app.models import OrderItemResponse, OrderResponse, ProductResponse
+from app.services.store_manager import DataStore
+
+THREADS = 16
+OPERATIONS = 2000
+
+
+def make_order(order_id: int) -> OrderResponse:
+    return OrderResponse(id=order_id, status="Pending", items=[OrderItemResponse(product_id=1, quantity=1)])
+
+
+def run_threads(target):
+    errors = []
+    start = threading.Barrier(THREADS)
+
+    def worker(seed: int):
+        try:
+            start.wait()
+            target(random.Random(seed))
+        except Exception as exc:  # pragma: no cover - surfaced by the assertion below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def assert_order_list_consistent(data_store: DataStore):
+    forward = []
+    node = data_store.orders_head
+    while node:
+        forward.append(node.id)
+        node = node.next
+
+    backward = []
+    node = data_store.orders_tail
+    while node:
+        backward.append(node.id)
+        node = node.prev
+
+    assert forward == backward[::-1]
+    assert len(forward) == len(set(forward)) == data_store.order_count()
+    assert forward == [o.id for o in data_store.get_all_orders()]
+
+
+def assert_tree_balanced(node, ids: list) -> int:
+    if node is None:
+        return 0
+    left = assert_tree_balanced(node.left, ids)
+    ids.append(node.id)
+    right = assert_tree_balanced(node.right, ids)
+    assert abs(left - right) <= 1
+    assert node.height == 1 + max(left, right)
+    return node.height
+
+
+def test_concurrent_order_mutations_keep_list_consistent():
+    data_store = DataStore()
+
+    def hammer(rng: random.Random):
+        for _ in range(OPERATIONS):
+            order_id = rng.randint(1, 200)
+            action = rng.random()
+            if action < 0.4:
+                data_store.add_order(make_order(order_id))
+            elif action < 0.7:
+                data_store.remove_order(order_id)
+            elif action < 0.9:
+                order = data_store.get_order(order_id)
+                assert order is None or order.id == order_id
+            else:
+                orders = data_store.get_all_orders()
+                assert len(orders) == len({o.id for o in orders})
+
+    run_threads(hammer)
+    assert_order_list_consistent(data_store)
+
+
+def test_concurrent_product_mutations_keep_tree_balanced():
+    data_store = DataStore(max_products=150)
+
+    def hammer(rng: random.Random):
+        for _ in range(OPERATIONS):
+            product_id = rng.randint(1, 300)
+            action = rng.random()
+            if action < 0.5:
+                data_store.insert_product(ProductResponse(id=product_id, name="Item", price=1))
+            elif action < 0.6:
+                data_store.remove_product(product_id)
+            else:
+                product = data_store.find_product(product_id)
+                assert product is None or product.id == product_id
+
+    run_threads(hammer)
+
+    ids = []
+    assert_tree_balanced(data_store.products_root, ids)
+    assert ids == sorted(set(ids))
+    stats = data_store.stats()["products"]
+    assert stats["entries"] == len(ids) <= 150
+    assert stats["hits"] + stats["misses"] > 0
@@ -0,0 +1,252 @@
+import random
+
+from app.models import OrderItemResponse, OrderResponse, ProductResponse
+from app.models.structures import BSTNode, ListNode
+from app.services.store_manager import DataStore
+
+
+def make_product(product_id: int) -> ProductResponse:
+    return ProductResponse(id=product_id, name=f"Product {product_id}", price=10)
+
+
+def test_sequential_inserts_stay_balanced():
+    data_store = DataStore()
+    for product_id in range(1, 5001):
+        data_store.insert_product(make_product(product_id))
+
+    assert data_store.products_root.height <= 14
+    assert data_store.find_product(1).id == 1
+    assert data_store.find_product(5000).id == 5000
+    assert data_store.find_product(5001) is None
+
+
+def test_insert_existing_id_replaces_product():
+    data_store = DataStore()
+    data_store.insert_product(make_product(1))
+    data_store.insert_product(ProductResponse(id=1, name="Renamed", price=20))
+
+    assert data_store.find_product(1).name == "Renamed"
+    assert data_store.products_root.left is None
+    assert data_store.products_root.right is None
+
+
+def test_remove_product_keeps_tree_searchable():
+    data_store = DataStore()
+    ids = list(range(1, 1001))
+    random.Random(42).shuffle(ids)
+    for product_id in ids:
+        data_store.insert_product(make_product(product_id))
+
+    for product_id in ids[:500]:
+        assert data_store.remove_product(product_id)
+
+    assert not data_store.remove_product(ids[0])
+    assert data_store.products_root.height <= 12
+    for product_id in ids[:500]:
+        assert data_store.find_product(product_id) is None
+    for product_id in ids[500:]:
+        assert data_store.find_product(product_id).id == product_id
+
+
+def test_equal_names_and_prices_are_indexed_by_id():
+    data_store = DataStore()
+    data_store.load_products([ProductResponse(id=i, name="Lamp", price=10) for i in range(1, 501)])
+    data_store.insert_product(ProductResponse(id=250, name="Desk", price=20))
+    assert data_store.remove_product(1)
+
+    ids = [p.id for p in data_store.search_products(name_prefix="la", min_price=10, max_price=10)]
+    assert ids == [i for i in range(2, 501) if i != 250]
+    assert [p.id for p in data_store.search_products(min_price=10.5)] == [250]
+    assert data_store._name_keys == sorted(data_store._name_keys)
+    assert data_store._price_keys == [(10, i) for i in ids] + [(20, 250)]
+
+
+def make_order(order_id: int, status: str = "Pending") -> OrderResponse:
+    return OrderResponse(id=order_id, status=status, items=[OrderItemResponse(product_id=1, quantity=1)])
+
+
+def test_orders_are_kept_sorted_by_id_and_replaced_in_place():
+    data_store = DataStore()
+    for order_id in (3, 1, 2):
+        data_store.add_order(make_order(order_id))
+
+    data_store.add_order(make_order(1, status="Shipped"))
+
+    assert [o.id for o in data_store.get_all_orders()] == [1, 2, 3]
+    assert data_store.orders_tail.id == 3
+    assert data_store.get_order(1).status == "Shipped"
+    assert [o.id for o in data_store.get_orders_page(after=1, limit=1)] == [2]
+    assert [o.id for o in data_store.get_orders_page(after=0)] == [1, 2, 3]
+
+
+def test_remove_order_unlinks_head_middle_and_tail():
+    data_store = DataStore()
+    for order_id in range(1, 6):
+        data_store.add_order(make_order(order_id))
+
+    assert data_store.remove_order(1)
+    assert data_store.remove_order(3)
+    assert data_store.remove_order(5)
+    assert not data_store.remove_order(5)
+
+    assert [o.id for o in data_store.get_all_orders()] == [2, 4]
+    assert data_store.orders_head.id == 2
+    assert data_store.orders_tail.id == 4
+    assert data_store.get_order(3) is None
+
+    data_store.add_order(make_order(6))
+    assert [o.id for o in data_store.get_all_orders()] == [2, 4, 6]
+
+
+def test_out_of_order_inserts_and_deleted_cursors_use_the_sorted_ids():
+    data_store = DataStore()
+    ids = random.Random(3).sample(range(1, 1000), 200)
+    for order_id in ids:
+        data_store.add_order(make_order(order_id))
+
+    expected = sorted(ids)
+    assert [o.id for o in data_store.get_all_orders()] == expected
+    assert data_store.orders_head.id == expected[0]
+    assert data_store.orders_tail.id == expected[-1]
+
+    cursor = expected[100]
+    data_store.remove_order(cursor)
+    assert [o.id for o in data_store.get_orders_page(after=cursor, limit=3)] == expected[101:104]
+    assert data_store.get_orders_page(after=expected[-1] + 1) == []
+
+
+def test_product_capacity_evicts_least_recently_used():
+    data_store = DataStore(max_products=3)
+    for product_id in (1, 2, 3):
+        data_store.insert_product(make_product(product_id))
+
+    data_store.find_product(1)
+    data_store.insert_product(make_product(4))
+
+    assert data_store.find_product(2) is None
+    assert [data_store.find_product(i).id for i in (1, 3, 4)] == [1, 3, 4]
+    assert data_store.product_stats.evictions == 1
+    assert data_store.product_stats.hits == 4
+    assert data_store.product_stats.misses == 1
+
+
+def test_order_eviction_marks_list_incomplete():
+    data_store = DataStore(max_orders=2)
+    data_store.add_order(make_order(1))
+    data_store.add_order(make_order(2))
+    data_store.orders_complete = True
+
+    data_store.add_order(make_order(3))
+
+    assert not data_store.orders_complete
+    assert [o.id for o in data_store.get_all_orders()] == [2, 3]
+    assert data_store.stats()["orders"]["evictions"] == 1
+
+
+def test_byte_budget_and_ttl(monkeypatch):
+    data_store = DataStore(max_bytes=200, ttl_seconds=10)
+    now = [1000.0]
+    monkeypatch.setattr("app.services.store_manager.time.monotonic", lambda: now[0])
+
+    for product_id in range(1, 11):
+        data_store.insert_product(make_product(product_id))
+
+    stats = data_store.stats()["products"]
+    assert 0 < stats["bytes"] <= 200
+    assert stats["entries"] < 10
+    assert data_store.find_product(10).id == 10
+
+    now[0] += 11
+    assert data_store.find_product(10) is None
+    assert data_store.product_stats.expirations == 1
+
+
+def test_nodes_are_compact_and_materialize_responses():
+    product = ProductResponse(id=1, name="Lamp", price=12.5, description=None)
+    order = OrderResponse(id=2, status="Pending", items=[OrderItemResponse(product_id=1, quantity=3),
+                                                         OrderItemResponse(product_id=4, quantity=1)])
+    product_node, order_node = BSTNode(product), ListNode(order)
+
+    assert not hasattr(product_node, "__dict__")
+    assert not hasattr(order_node, "__dict__")
+    assert list(order_node.items) == [1, 3, 4, 1]
+    assert product_node.product == product
+    assert order_node.order.model_dump() == order.model_dump()
+    assert product_node.to_json() == product.model_dump_json().encode()
+    assert order_node.to_json() == order.model_dump_json().encode()
+
+
+def test_encoded_responses_are_cached_until_the_entry_changes():
+    data_store = DataStore()
+    data_store.insert_product(ProductResponse(id=1, name="Lamp", price=12.5))
+    data_store.add_orders([OrderResponse(id=1, status="Pending", items=[])], complete=True)
+
+    encoded = data_store.find_product(1, as_json=True)
+    assert encoded == b'{"name":"Lamp","price":12.5,"description":null,"id":1}'
+    assert data_store.find_product(1, as_json=True) is encoded
+
+    data_store.insert_product(ProductResponse(id=1, name="Desk Lamp", price=12.5))
+    assert b"Desk Lamp" in data_store.find_product(1, as_json=True)
+
+    assert data_store.get_all_orders(as_json=True) == b'[{"id":1,"status":"Pending","items":[]}]'
+    data_store.update_order_node(OrderResponse(id=1, status="Shipped", items=[]))
+    assert data_store.get_order(1, as_json=True) == b'{"id":1,"status":"Shipped","items":[]}'
+
+    uncached = DataStore(cache_json=False)
+    uncached.insert_product(ProductResponse(id=1, name="Lamp", price=12.5))
+    assert uncached.find_product(1, as_json=True) == encoded
+    assert uncached.find_product(1, as_json=True) is not encoded
+
+
+def test_negative_lookups_expire_and_are_invalidated(monkeypatch):
+    data_store = DataStore(negative_max_entries=2, negative_ttl_seconds=30)
+    now = [1000.0]
+    monkeypatch.setattr("app.services.store_manager.time.monotonic", lambda: now[0])
+
+    data_store.remember_missing_products([1, 2, 3])
+    assert not data_store.is_missing_product(1)
+    assert data_store.is_missing_product(2) and data_store.is_missing_product(3)
+
+    data_store.insert_product(make_product(2))
+    assert not data_store.is_missing_product(2)
+
+    now[0] += 31
+    assert not data_store.is_missing_product(3)
+    assert data_store.stats()["products"]["negative_hits"] == 2
+
+    # Another worker may have created it: without shared events a complete
+    # catalog is not proof of absence.
+    data_store.load_products([make_product(5)], complete=True)
+    assert not data_store.is_missing_product(4)
+    assert not data_store.is_missing_product(5)
+
+    data_store.remember_missing_orders([7])
+    data_store.add_order(OrderResponse(id=7, status="Pending", items=[]))
+    assert not data_store.is_missing_order(7)
+
+
+def test_entity_tags_follow_the_content():
+    data_store = DataStore()
+    data_store.insert_product(ProductResponse(id=1, name="Lamp", price=12.5))
+    data_store.add_order(OrderResponse(id=1, status="Pending", items=[]))
+
+    etag, body = data_store.tagged_product(1)
+    assert body == data_store.find_product(1, as_json=True)
+    assert data_store.tagged_product(1, encode=False) == (etag, None)
+    assert data_store.tagged_order(1)[0] != etag
+
+    other_worker = DataStore(cache_json=False)
+    other_worker.insert_product(ProductResponse(id=1, name="Lamp", price=12.5))
+    assert other_worker.tagged_product(1, encode=False)[0] == etag
+    data_store.insert_product(ProductResponse(id=1, name="Lamp", price=12.5))
+    assert data_store.tagged_product(1)[0] == etag
+
+    data_store.insert_product(ProductResponse(id=1, name="Lamp", price=10))
+    assert data_store.tagged_product(1)[0] != etag
+    assert DataStore().tagged_product(1) is None
+
+    order_etag = data_store.tagged_order(1)[0]
+    data_store.update_order_node(OrderResponse(id=1, status="Shipped", items=[]))
+    assert data_store.tagged_order(1)[0] != order_etag
+    data_store.remove_order(1)
+    assert data_store.tagged_order(1) is None
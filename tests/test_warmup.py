@@ -0,0 +1,69 @@
+from sqlalchemy import event
+
+from app.models import OrderCreate, OrderItemCreate, ProductCreate
+from app.services import CacheWarmup, OrderService, ProductService, store
+
+
+def seed(db_session, products: int = 6, orders: int = 4):
+    created = [
+        ProductService.create(db_session, ProductCreate(name=f"Item {i}", price=10 + i))
+        for i in range(products)
+    ]
+    for i in range(orders):
+        OrderService.create(
+            db_session,
+            OrderCreate(items=[OrderItemCreate(product_id=created[i].id, quantity=i + 1)])
+        )
+    store.clear()
+    return created
+
+
+def test_full_warmup_serves_requests_without_sql(client, db_session):
+    products = seed(db_session)
+
+    report = CacheWarmup.run(db_session, mode="full", chunk_size=2)
+    assert report["products"] == 6
+    assert report["orders"] == 4
+    assert store.products_complete
+    assert store.orders_complete
+    assert store.products_root.height == 3
+
+    statements = []
+    engine = db_session.get_bind()
+
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count_statement)
+    try:
+        assert client.get(f"/products/{products[-1].id}").status_code == 200
+        orders = client.get("/orders/").json()
+    finally:
+        event.remove(engine, "before_cursor_execute", count_statement)
+
+    assert statements == []
+    assert [o["items"][0]["quantity"] for o in orders] == [1, 2, 3, 4]
+
+
+def test_recent_warmup_loads_newest_subset(db_session):
+    products = seed(db_session)
+
+    report = CacheWarmup.run(db_session, mode="recent", recent=3)
+
+    assert report["products"] == 3
+    assert report["orders"] == 3
+    assert not store.products_complete
+    assert not store.orders_complete
+    assert store.find_product(products[0].id) is None
+    assert store.find_product(products[-1].id) is not None
+    assert [o.id for o in store.get_all_orders()] == sorted(o.id for o in store.get_all_orders())
+
+
+def test_products_warmup_skips_orders(db_session):
+    seed(db_session)
+
+    report = CacheWarmup.run(db_session, mode="products")
+
+    assert report["products"] == 6
+    assert "orders" not in report
+    assert store.order_count() == 0
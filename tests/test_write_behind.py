@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models.sql_models import OrderSQL
+from app.services import OrderStatusWriteBehind, status_writer, store
+
+
+@pytest.fixture
+def write_behind(db_session, tmp_path, monkeypatch):
+    monkeypatch.setattr(status_writer, "enabled", True)
+    monkeypatch.setattr(status_writer, "path", str(tmp_path / "status.journal"))
+    monkeypatch.setattr(status_writer, "flush_interval", 3600)
+    status_writer.start(sessionmaker(bind=db_session.get_bind()))
+    yield status_writer
+    status_writer.stop()
+
+
+@pytest.fixture
+def order(client):
+    product = client.post("/products/", json={"name": "Crate", "price": 8}).json()
+    return client.post("/orders/", json={"items": [{"product_id": product["id"], "quantity": 2}]}).json()
+
+
+def sql_status(db_session, order_id):
+    db_session.expire_all()
+    return db_session.get(OrderSQL, order_id).status
+
+
+def test_status_updates_are_journaled_and_coalesced(client, db_session, order, write_behind):
+    for status in ("Shipped", "Delivered"):
+        response = client.put(f"/orders/{order['id']}", json={"status": status})
+        assert response.json()["status"] == status
+
+    assert sql_status(db_session, order["id"]) == "Pending"
+    with open(write_behind.path) as journal:
+        assert journal.read() == f"{order['id']}\tShipped\n{order['id']}\tDelivered\n"
+
+    store.clear()
+    cold = client.get(f"/orders/{order['id']}").json()
+    assert cold["status"] == "Delivered"
+    assert cold["items"] == order["items"]
+
+    assert write_behind.flush() == 1
+    assert sql_status(db_session, order["id"]) == "Delivered"
+    assert write_behind.stats()["pending"] == 0
+    with open(write_behind.path) as journal:
+        assert journal.read() == ""
+
+
+def test_item_updates_keep_the_deferred_status(client, db_session, order, write_behind):
+    client.put(f"/orders/{order['id']}", json={"status": "Shipped"})
+    response = client.put(f"/orders/{order['id']}", json={"items": [{"product_id": order["items"][0]["product_id"],
+                                                                     "quantity": 5}]})
+
+    assert response.json()["status"] == "Shipped"
+    assert response.json()["items"][0]["quantity"] == 5
+    assert sql_status(db_session, order["id"]) == "Pending"
+
+    write_behind.flush()
+    assert sql_status(db_session, order["id"]) == "Shipped"
+
+
+def test_journal_is_replayed_on_start(db_session, order, tmp_path):
+    path = tmp_path / "status.journal"
+    path.write_text(f"{order['id']}\tShipped\n{order['id']}\tCancelled\n{order['id']}\tDeliv")
+
+    writer = OrderStatusWriteBehind(str(path), flush_interval=3600, enabled=True)
+    writer.start(sessionmaker(bind=db_session.get_bind()))
+    try:
+        assert writer.pending_status(order["id"]) == "Cancelled"
+        with pytest.raises(RuntimeError):
+            OrderStatusWriteBehind(str(path), enabled=True).start(sessionmaker(bind=db_session.get_bind()))
+    finally:
+        writer.stop()
+
+    assert sql_status(db_session, order["id"]) == "Cancelled"
+    assert path.read_text() == ""